@@ -0,0 +1,34 @@
+"""add content_hash and composite indexes
+
+Revision ID: c41b9d2a7f03
+Revises:
+Create Date: 2026-08-26 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41b9d2a7f03'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_documents_content_hash'), 'documents', ['content_hash'], unique=False)
+    op.create_index('ix_doc_user_created', 'documents', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_chunk_doc_order', 'document_chunks', ['document_id', 'chunk_index'], unique=False)
+    op.create_index('ix_fc_user_due', 'flashcards', ['user_id', 'next_review_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fc_user_due', table_name='flashcards')
+    op.drop_index('ix_chunk_doc_order', table_name='document_chunks')
+    op.drop_index('ix_doc_user_created', table_name='documents')
+    op.drop_index(op.f('ix_documents_content_hash'), table_name='documents')
+    op.drop_column('documents', 'content_hash')
@@ -10,6 +10,7 @@ from app.schemas.chat import (
     SourceDocument,
     GenerateFlashcardsRequest,
     SearchRequest,
+    SearchBatchRequest,
     SearchResult
 )
 from app.services.rag_services import RAGService
@@ -17,25 +18,34 @@ from app.services.document_service import DocumentService
 
 router = APIRouter(prefix="/chat", tags=["Chat & RAG"])
 
+# Pre-baked suggested-question templates; {t} is the document title.
+SUGGESTED_QUESTION_TEMPLATES = (
+    "What are the main topics in {t}?",
+    "Summarize the key concepts in {t}",
+    "What are the most important points to remember?",
+    "Create practice problems from {t}",
+    "Explain the most complex concept in simple terms",
+)
+
 
 @router.post("/ask", response_model=ChatResponse)
-def ask_question(
+async def ask_question(
     request: ChatRequest,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
     rag_service: RAGService = Depends(get_rag_service),
 ):
     if request.document_id:
-        document = doc_service.get_document(request.document_id, current_user.id)
-        if not document:
+        doc_status = await doc_service.get_document_status(request.document_id, current_user.id)
+        if doc_status is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Document not found"
             )
-        if document.status != ProcessingStatus.COMPLETED:
+        if doc_status != ProcessingStatus.COMPLETED:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Document is not ready. Status: {document.status}"
+                detail=f"Document is not ready. Status: {doc_status}"
             )
 
     try:
@@ -46,7 +56,7 @@ def ask_question(
                 for msg in request.chat_history
             ]
 
-        result = rag_service.ask_question(
+        result = await rag_service.aask_question(
             question=request.question,
             user_id=current_user.id,
             document_id=request.document_id,
@@ -77,26 +87,26 @@ def ask_question(
 
 
 @router.post("/generate-flashcards")
-def generate_flashcards(
+async def generate_flashcards(
     request: GenerateFlashcardsRequest,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
     rag_service: RAGService = Depends(get_rag_service),
 ):
-    document = doc_service.get_document(request.document_id, current_user.id)
-    if not document:
+    doc_status = await doc_service.get_document_status(request.document_id, current_user.id)
+    if doc_status is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
-    if document.status != ProcessingStatus.COMPLETED:
+    if doc_status != ProcessingStatus.COMPLETED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Document not ready. Status: {document.status}"
+            detail=f"Document not ready. Status: {doc_status}"
         )
 
     try:
-        flashcards = rag_service.generate_flashcards(
+        flashcards = await rag_service.agenerate_flashcards(
             user_id=current_user.id,
             document_id=request.document_id,
             topic=request.topic,
@@ -146,13 +156,46 @@ def search_documents(
         )
 
 
+@router.post("/search/batch", response_model=List[List[SearchResult]])
+async def search_documents_batch(
+    request: SearchBatchRequest,
+    current_user: User = Depends(get_current_user),
+    rag_service: RAGService = Depends(get_rag_service),
+):
+    """Resolve several related queries (multi-query RAG) in one round trip."""
+    try:
+        batches = await rag_service.abatch_search(
+            queries=request.queries,
+            user_id=current_user.id,
+            document_id=request.document_id,
+            k=request.k
+        )
+        return [
+            [
+                SearchResult(
+                    content=r["content"],
+                    page=str(r.get("page", "unknown")),
+                    document_id=r.get("document_id")
+                )
+                for r in results
+            ]
+            for results in batches
+        ]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Search failed: {str(e)}"
+        )
+
+
 @router.get("/history/{document_id}")
-def get_suggested_questions(
+async def get_suggested_questions(
     document_id: int,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
 ):
-    document = doc_service.get_document(document_id, current_user.id)
+    document = await doc_service.get_document(document_id, current_user.id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,10 +205,7 @@ def get_suggested_questions(
         "document_id": document_id,
         "document_title": document.title,
         "suggested_questions": [
-            f"What are the main topics in {document.title}?",
-            f"Summarize the key concepts in {document.title}",
-            f"What are the most important points to remember?",
-            f"Create practice problems from {document.title}",
-            f"Explain the most complex concept in simple terms"
+            template.format(t=document.title)
+            for template in SUGGESTED_QUESTION_TEMPLATES
         ]
     }
@@ -1,9 +1,13 @@
-from functools import lru_cache
-from fastapi import Depends, HTTPException, status
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, get_db  # noqa: F401 — get_db re-exported for sync routes
 from app.models.user import User
 from app.utils.security import decode_access_token
 from app.services.document_service import DocumentService
@@ -11,13 +15,43 @@ from app.services.rag_services import RAGService
 
 security = HTTPBearer()
 
+# Short-TTL cache of authenticated users keyed by token, so repeated
+# requests within the window skip the per-request DB round trip.
+# Deactivation takes effect within USER_CACHE_TTL seconds at worst.
+USER_CACHE_TTL = 30.0
+USER_CACHE_MAX = 10_000
+_user_cache: "OrderedDict[str, tuple[float, User]]" = OrderedDict()
+
+
+def _cached_user(token: str) -> User | None:
+    entry = _user_cache.get(token)
+    if entry is None:
+        return None
+    cached_at, user = entry
+    if time.monotonic() - cached_at > USER_CACHE_TTL:
+        _user_cache.pop(token, None)
+        return None
+    _user_cache.move_to_end(token)
+    return user
+
+
+def _cache_user(token: str, user: User) -> None:
+    _user_cache[token] = (time.monotonic(), user)
+    _user_cache.move_to_end(token)
+    while len(_user_cache) > USER_CACHE_MAX:
+        _user_cache.popitem(last=False)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     token = credentials.credentials
 
+    cached = _cached_user(token)
+    if cached is not None:
+        return cached
+
     _401 = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
@@ -32,7 +66,8 @@ async def get_current_user(
     if user_id is None:
         raise _401
 
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
     if user is None:
         raise _401
 
@@ -42,6 +77,7 @@ async def get_current_user(
             detail="User account is inactive",
         )
 
+    _cache_user(token, user)
     return user
 
 
@@ -54,16 +90,40 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def get_document_service(db: Session = Depends(get_db)) -> DocumentService:
+def get_now() -> datetime:
+    """
+    Current UTC time for the request, naive to match the DateTime columns.
+
+    Injected via Depends so FastAPI's dependency cache gives every
+    consumer in one request the same timestamp; also avoids the
+    deprecated datetime.utcnow().
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_document_service(db: AsyncSession = Depends(get_async_db)) -> DocumentService:
     """Inject a DocumentService instance into route handlers."""
     return DocumentService(db)
 
 
-@lru_cache(maxsize=1)
-def get_rag_service() -> RAGService:
+def rag_service_from_app(app) -> RAGService:
+    """
+    Return the process-wide RAGService attached to app.state.
+
+    Startup tries to build it eagerly; if that failed (e.g. missing keys
+    in dev), it is constructed lazily on first use.
+    """
+    rag = getattr(app.state, "rag", None)
+    if rag is None:
+        rag = RAGService()
+        app.state.rag = rag
+    return rag
+
+
+def get_rag_service(request: Request) -> RAGService:
     """
-    Return a cached RAGService singleton.
-    RAGService.__init__ initialises LLM clients — caching avoids
-    that overhead on every request.
+    Inject the app.state RAGService singleton.
+    RAGService.__init__ initialises LLM clients — sharing one instance
+    avoids that overhead on every request.
     """
-    return RAGService()
+    return rag_service_from_app(request.app)
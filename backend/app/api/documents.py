@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, status
 from typing import List
 
+from app.database import AsyncSessionLocal
 from app.models.user import User
 from app.api.deps import get_current_user, get_document_service
 from app.schemas.document import (
@@ -9,14 +12,25 @@ from app.schemas.document import (
     DocumentUpdate,
     ChunkResponse
 )
-from app.services.document_service import DocumentService
+from app.services.document_service import DocumentService, UploadTooLargeError
 from app.config import settings
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
-@router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+async def _process_document_task(document_id: int) -> None:
+    """Run PDF processing in the background with its own DB session."""
+    async with AsyncSessionLocal() as db:
+        try:
+            await DocumentService(db).process_document(document_id)
+        except Exception as e:
+            # process_document already marked the document FAILED
+            print(f"Error processing document {document_id}: {str(e)}")
+
+
+@router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: str = None,
     current_user: User = Depends(get_current_user),
@@ -25,66 +39,93 @@ async def upload_document(
     if file.content_type not in settings.ALLOWED_FILE_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
+    # Reject oversized/empty uploads from the parsed size before touching
+    # the body; the save path re-enforces the limit while streaming.
+    if file.size is not None:
+        if file.size > settings.MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File size exceeds the maximum limit",
+            )
+        if file.size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
-    if file_size > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(status_code=400, detail="File size exceeds the maximum limit")
-
-    if file_size == 0:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    try:
+        spool, content_hash = await DocumentService.read_upload(file)
+    except UploadTooLargeError as e:
+        # Clients that don't send Content-Length only hit the limit
+        # here, mid-stream — same client error, same 413 as above.
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error uploading document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
     try:
-        file_path, file_size = DocumentService.save_upload_file(file, current_user.id)
+        # Same bytes already uploaded by this user? Return the existing
+        # document and skip storage + extraction entirely.
+        existing = await doc_service.find_by_content_hash(current_user.id, content_hash)
+        if existing:
+            return existing
+
+        # Streamed to storage off the loop; blocks only a pool thread.
+        file_path, file_size = await asyncio.to_thread(
+            DocumentService.save_upload_file, spool, current_user.id, file.filename
+        )
 
-        document = doc_service.create_document(
+        document = await doc_service.create_document(
             user=current_user,
             filename=file.filename,
             file_path=file_path,
             file_size=file_size,
-            title=title
+            title=title,
+            content_hash=content_hash
         )
 
-        try:
-            document = doc_service.process_document(document.id)
-        except Exception as e:
-            print(f"Error processing document {document.id}: {str(e)}")
+        # Process after the response goes out; clients poll
+        # /documents/{id} (or listen on the WebSocket) for status.
+        background_tasks.add_task(_process_document_task, document.id)
 
         return document
     except Exception as e:
         print(f"Error uploading document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        spool.close()
 
 
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
+async def list_documents(
     skip: int = 0,
     limit: int = 10,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
 ):
-    return doc_service.get_user_documents(
+    return await doc_service.get_user_documents(
         user_id=current_user.id,
         skip=skip,
         limit=min(limit, 100)
     )
 
 
-@router.get("/{document_id}", response_model=DocumentWithContent)
-def get_document(
+@router.get("/{document_id}", response_model=DocumentResponse)
+async def get_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
 ):
-    document = doc_service.get_document(document_id, current_user.id)
+    document = await doc_service.get_document(document_id, current_user.id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     return document
 
 
 @router.get("/{document_id}/content", response_model=DocumentWithContent)
-def get_document_content(
+async def get_document_content(
     document_id: int,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
@@ -94,7 +135,7 @@ def get_document_content(
 
     Senior Tip: Separate endpoint for content to avoid large payloads on list.
     """
-    document = doc_service.get_document(document_id, current_user.id)
+    document = await doc_service.get_document(document_id, current_user.id, with_content=True)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -104,7 +145,7 @@ def get_document_content(
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_document(
+async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
@@ -114,7 +155,7 @@ def delete_document(
 
     Senior Tip: Return 204 No Content for successful DELETE.
     """
-    deleted = doc_service.delete_document(document_id, current_user.id)
+    deleted = await doc_service.delete_document(document_id, current_user.id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -123,9 +164,10 @@ def delete_document(
     return None
 
 
-@router.post("/{document_id}/reprocess", response_model=DocumentResponse)
-def reprocess_document(
+@router.post("/{document_id}/reprocess", response_model=DocumentResponse, status_code=status.HTTP_202_ACCEPTED)
+async def reprocess_document(
     document_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     doc_service: DocumentService = Depends(get_document_service),
 ):
@@ -133,17 +175,14 @@ def reprocess_document(
     Reprocess a document (if extraction failed).
 
     Use case: Retry failed processing or update chunking strategy.
+    Runs in the background like the upload path — poll /documents/{id}
+    for status instead of holding the request open through extraction.
     """
-    document = doc_service.get_document(document_id, current_user.id)
+    document = await doc_service.get_document(document_id, current_user.id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
-    try:
-        return doc_service.process_document(document_id)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to reprocess document: {str(e)}"
-        )
+    background_tasks.add_task(_process_document_task, document_id)
+    return document
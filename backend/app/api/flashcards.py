@@ -2,22 +2,24 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_db, get_now
 from app.models.flashcard import Flashcard
 from app.models.study_session import StudySession
 from app.models.user import User
 from app.schemas.flashcard import (
     BulkFlashcardCreate,
     DueFlashcardsResponse,
+    FlashcardBatchReview,
     FlashcardCreate,
     FlashcardResponse,
     FlashcardReview,
     ReviewResult,
     StudySessionSummary,
 )
-from app.services.sm2 import calculate_sm2
+from app.services.sm2 import calculate_sm2, calculate_sm2_batch
 
 router = APIRouter(prefix="/flashcards", tags=["Flashcards"])
 
@@ -50,9 +52,8 @@ def bulk_create_flashcards(
         for card in data.flashcards
     ]
     db.add_all(cards)
+    db.flush()  # single INSERT..RETURNING populates PKs and defaults
     db.commit()
-    for card in cards:
-        db.refresh(card)
     return cards
 
 
@@ -80,15 +81,18 @@ def get_due_flashcards(
     limit: int = 20,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    now: datetime = Depends(get_now),
 ):
-    now = datetime.utcnow()
-    query = db.query(Flashcard).filter(Flashcard.user_id == current_user.id)
+    query = db.query(Flashcard).filter(
+        Flashcard.user_id == current_user.id,
+        Flashcard.next_review_date <= now,
+    )
     if document_id is not None:
         query = query.filter(Flashcard.document_id == document_id)
 
-    all_cards = query.all()
-    due = [c for c in all_cards if c.next_review_date <= now]
-    due = due[:limit]
+    # Most-overdue first; the SQL accuracy hybrid breaks ties so the
+    # weakest cards surface ahead of equally-due stronger ones.
+    due = query.order_by(Flashcard.next_review_date, Flashcard.accuracy).limit(limit).all()
 
     new_cards = sum(1 for c in due if c.total_reviews == 0)
     review_cards = len(due) - new_cards
@@ -126,6 +130,7 @@ def review_flashcard(
     review: FlashcardReview,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    now: datetime = Depends(get_now),
 ):
     card = db.query(Flashcard).filter(
         Flashcard.id == flashcard_id,
@@ -146,7 +151,7 @@ def review_flashcard(
     card.interval = result.interval
     card.next_review_date = result.next_review_date
     card.total_reviews += 1
-    card.last_reviewed_at = datetime.utcnow()
+    card.last_reviewed_at = now
 
     if result.is_correct:
         card.correct_reviews += 1
@@ -165,6 +170,74 @@ def review_flashcard(
     )
 
 
+@router.post("/review/batch", response_model=List[ReviewResult])
+def review_flashcards_batch(
+    data: FlashcardBatchReview,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    now: datetime = Depends(get_now),
+):
+    """
+    Apply SM-2 to a whole batch of reviews in one round trip.
+
+    The scheduling math runs vectorized (calculate_sm2_batch) and the
+    writes go out as a single bulk UPDATE instead of one commit per card.
+    """
+    ids = [r.flashcard_id for r in data.reviews]
+    cards = db.query(Flashcard).filter(
+        Flashcard.id.in_(ids),
+        Flashcard.user_id == current_user.id,
+    ).all()
+
+    card_by_id = {c.id: c for c in cards}
+    missing = [i for i in ids if i not in card_by_id]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Flashcards not found: {missing}",
+        )
+
+    ordered = [card_by_id[i] for i in ids]
+    result = calculate_sm2_batch(
+        qualities=[r.quality for r in data.reviews],
+        repetitions=[c.repetitions for c in ordered],
+        easiness_factors=[c.easiness_factor for c in ordered],
+        intervals=[c.interval for c in ordered],
+        now=now,
+    )
+
+    db.bulk_update_mappings(
+        Flashcard,
+        [
+            {
+                "id": card.id,
+                "repetitions": result["repetitions"][i],
+                "easiness_factor": result["easiness_factor"][i],
+                "interval": result["interval"][i],
+                "next_review_date": result["next_review_date"][i],
+                "total_reviews": card.total_reviews + 1,
+                "correct_reviews": card.correct_reviews + (1 if result["is_correct"][i] else 0),
+                "last_reviewed_at": now,
+            }
+            for i, card in enumerate(ordered)
+        ],
+    )
+    db.commit()
+
+    return [
+        ReviewResult(
+            flashcard_id=card.id,
+            quality=data.reviews[i].quality,
+            next_review_date=result["next_review_date"][i],
+            interval_days=result["interval"][i],
+            is_correct=result["is_correct"][i],
+            new_repetitions=result["repetitions"][i],
+            new_easiness_factor=result["easiness_factor"][i],
+        )
+        for i, card in enumerate(ordered)
+    ]
+
+
 # ---------------------------------------------------------------------------
 # Delete
 # ---------------------------------------------------------------------------
@@ -206,6 +279,7 @@ def end_study_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    now: datetime = Depends(get_now),
 ):
     session = db.query(StudySession).filter(
         StudySession.id == session_id,
@@ -214,7 +288,6 @@ def end_study_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    now = datetime.utcnow()
     session.completed_at = now
     session.duration_seconds = int((now - session.started_at).total_seconds())
     db.commit()
@@ -254,31 +327,36 @@ def record_review_in_session(
 def get_analytics(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    now: datetime = Depends(get_now),
 ):
-    cards = db.query(Flashcard).filter(Flashcard.user_id == current_user.id).all()
-    sessions = db.query(StudySession).filter(StudySession.user_id == current_user.id).all()
-
-    total_cards = len(cards)
-    total_reviews = sum(c.total_reviews for c in cards)
-    total_correct = sum(c.correct_reviews for c in cards)
-    now = datetime.utcnow()
-    due_today = sum(1 for c in cards if c.next_review_date <= now)
-    mastered = sum(1 for c in cards if c.repetitions >= 3 and c.easiness_factor >= 2.0)
+    total_cards, total_reviews, total_correct, due_today, mastered = db.query(
+        func.count(Flashcard.id),
+        func.coalesce(func.sum(Flashcard.total_reviews), 0),
+        func.coalesce(func.sum(Flashcard.correct_reviews), 0),
+        func.sum(case((Flashcard.next_review_date <= now, 1), else_=0)),
+        func.sum(
+            case(
+                (and_(Flashcard.repetitions >= 3, Flashcard.easiness_factor >= 2.0), 1),
+                else_=0,
+            )
+        ),
+    ).filter(Flashcard.user_id == current_user.id).one()
+
+    total_sessions, avg_duration = db.query(
+        func.count(StudySession.id),
+        func.avg(StudySession.duration_seconds).filter(
+            StudySession.completed_at.isnot(None)
+        ),
+    ).filter(StudySession.user_id == current_user.id).one()
 
     overall_accuracy = round((total_correct / total_reviews * 100), 1) if total_reviews else 0.0
 
-    completed_sessions = [s for s in sessions if s.completed_at]
-    avg_session_duration = (
-        round(sum(s.duration_seconds for s in completed_sessions) / len(completed_sessions))
-        if completed_sessions else 0
-    )
-
     return {
         "total_cards": total_cards,
         "total_reviews": total_reviews,
         "overall_accuracy": overall_accuracy,
-        "due_today": due_today,
-        "mastered_cards": mastered,
-        "total_sessions": len(sessions),
-        "avg_session_duration_seconds": avg_session_duration,
+        "due_today": due_today or 0,
+        "mastered_cards": mastered or 0,
+        "total_sessions": total_sessions,
+        "avg_session_duration_seconds": round(avg_duration) if avg_duration is not None else 0,
     }
@@ -7,35 +7,34 @@ Flow:
   3. Server streams back text chunks as plain strings
   4. Server sends JSON {"type": "done", "sources": [...]} when complete
 """
-import json
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.utils.security import decode_access_token
 from app.models.user import User
-from app.services.rag_services import RAGService
-from app.api.deps import get_rag_service
+from app.api.deps import rag_service_from_app
 
 router = APIRouter()
-_rag: RAGService | None = None
 
+# Coalesce streamed tokens into frames of roughly this many characters;
+# one frame per token means a syscall and a WebSocket frame per word.
+STREAM_FLUSH_CHARS = 128
 
-def _get_rag() -> RAGService:
-    global _rag
-    if _rag is None:
-        _rag = get_rag_service()
-    return _rag
 
-
-def _authenticate(token: str, db: Session) -> User | None:
+async def _authenticate(token: str) -> User | None:
     payload = decode_access_token(token)
     if not payload:
         return None
     user_id = payload.get("user_id")
     if not user_id:
         return None
-    return db.query(User).filter(User.id == user_id, User.is_active == True).first()  # noqa: E712
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User).where(User.id == user_id, User.is_active == True)  # noqa: E712
+        )
+        return result.scalar_one_or_none()
 
 
 @router.websocket("/ws/chat")
@@ -43,64 +42,64 @@ async def websocket_chat(
     websocket: WebSocket,
     token: str = Query(...),
 ):
-    db: Session = SessionLocal()
-    try:
-        user = _authenticate(token, db)
-        if not user:
-            await websocket.accept()
-            await websocket.close(code=4001, reason="Unauthorized")
-            return
-
+    user = await _authenticate(token)
+    if not user:
         await websocket.accept()
-
-        while True:
-            try:
-                raw = await websocket.receive_text()
-            except WebSocketDisconnect:
-                break
-
-            try:
-                data = json.loads(raw)
-            except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({"type": "error", "message": "Invalid JSON"}))
-                continue
-
-            question = data.get("question", "").strip()
-            if not question:
-                continue
-
-            document_id = data.get("document_id")
-            query_mode = data.get("query_mode", "normal")
-            chat_history = data.get("chat_history", [])
-
-            try:
-                # RAGService.ask_question is synchronous; run it and stream the answer
-                # word-by-word to simulate streaming (true streaming requires LangChain streaming callbacks)
-                rag = _get_rag()
-                result = rag.ask_question(
-                    question=question,
-                    user_id=user.id,
-                    document_id=document_id,
-                    chat_history=chat_history,
-                    query_mode=query_mode,
-                )
-
-                answer: str = result["answer"]
-                # Stream word-by-word
-                words = answer.split(" ")
-                for i, word in enumerate(words):
-                    chunk = word if i == len(words) - 1 else word + " "
-                    await websocket.send_text(json.dumps({"type": "chunk", "text": chunk}))
-
-                # Send completion message with sources
-                await websocket.send_text(json.dumps({
-                    "type": "done",
-                    "sources": result.get("sources", []),
-                    "query_mode": result.get("query_mode"),
-                }))
-
-            except Exception as e:
-                await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
-
-    finally:
-        db.close()
+        await websocket.close(code=4001, reason="Unauthorized")
+        return
+
+    await websocket.accept()
+
+    while True:
+        try:
+            raw = await websocket.receive_text()
+        except WebSocketDisconnect:
+            break
+
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            await websocket.send_text(orjson.dumps({"type": "error", "message": "Invalid JSON"}).decode())
+            continue
+
+        question = data.get("question", "").strip()
+        if not question:
+            continue
+
+        document_id = data.get("document_id")
+        query_mode = data.get("query_mode", "normal")
+        chat_history = data.get("chat_history", [])
+
+        try:
+            # Stream real model tokens as they are generated; the final
+            # event carries the sources once the answer is complete.
+            rag = rag_service_from_app(websocket.app)
+            buffer: list[str] = []
+            buffered_chars = 0
+            async for event in rag.astream_question(
+                question=question,
+                user_id=user.id,
+                document_id=document_id,
+                chat_history=chat_history,
+                query_mode=query_mode,
+            ):
+                if event["type"] == "chunk":
+                    buffer.append(event["text"])
+                    buffered_chars += len(event["text"])
+                    if buffered_chars >= STREAM_FLUSH_CHARS:
+                        await websocket.send_text(orjson.dumps(
+                            {"type": "chunk", "text": "".join(buffer)}
+                        ).decode())
+                        buffer.clear()
+                        buffered_chars = 0
+                else:
+                    if buffer:
+                        await websocket.send_text(orjson.dumps(
+                            {"type": "chunk", "text": "".join(buffer)}
+                        ).decode())
+                        buffer.clear()
+                        buffered_chars = 0
+                    await websocket.send_text(orjson.dumps(event).decode())
+
+        except Exception as e:
+            await websocket.send_text(orjson.dumps({"type": "error", "message": str(e)}).decode())
@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,10 +34,21 @@ class Settings(BaseSettings):
     UPLOAD_DIRECTORY: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     ALLOWED_FILE_TYPES: list = ["application/pdf"]
+    # Keep the full extracted text on the Document row. RAG only reads
+    # chunks, so this duplicates megabytes per document in Postgres;
+    # when off, /content reconstructs the text from chunks on demand.
+    STORE_FULL_TEXT: bool = False
 
     # App
     DEBUG: bool = False
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:8000,https://study-ai-sepia.vercel.app,https://study-ai-murex.vercel.app"
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
+    @cached_property
+    def allowed_origins_list(self) -> list[str]:
+        """ALLOWED_ORIGINS parsed once; consumers share the same list."""
+        if not self.ALLOWED_ORIGINS:
+            return ["*"]
+        return [o.strip() for o in self.ALLOWED_ORIGINS.split(",")]
+
 settings = Settings()
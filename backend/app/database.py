@@ -1,20 +1,61 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
+# Defaults (pool_size=5) serialize request bursts on pool checkout.
+# query_cache_size keeps compiled statements hot; the QueuePool knobs
+# only apply to Postgres — SQLite (dev/tests) uses a different pool class.
+_engine_kwargs = dict(
     pool_pre_ping=True,
     echo=settings.DEBUG,
+    query_cache_size=1200,
+)
+if settings.DATABASE_URL.startswith("postgresql"):
+    _engine_kwargs.update(
+        pool_size=20,
+        max_overflow=40,
+        pool_recycle=1800,
+    )
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    **_engine_kwargs,
 )
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,
     bind=engine,
 )
 
+
+def _async_database_url(url: str) -> str:
+    """Map the configured URL onto its asyncio driver."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Async engine for hot request paths (auth, chat, WebSocket) so DB waits
+# don't block the event loop or burn threadpool slots. Background and
+# low-traffic CRUD keep the sync engine for now.
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    **_engine_kwargs,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession,
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -25,6 +66,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     
     Base.metadata.create_all(bind=engine)
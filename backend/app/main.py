@@ -1,14 +1,61 @@
 
+import asyncio
+import contextlib
+import os
+from contextlib import asynccontextmanager
+
+import orjson
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-import os
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
 from app.database import init_db
 from app.api import auth, documents, chat, flashcards, websocket
+from app.api.deps import rag_service_from_app
+
+# Flipped once _deferred_init finishes; /health/ready reports 503 until then.
+READY = False
+
+
+async def _deferred_init(app: FastAPI) -> None:
+    """Startup work that shouldn't delay binding the port."""
+    global READY
+
+    print("🚀 Starting up StudyAI API...")
+
+    await asyncio.to_thread(init_db)
+    print("✅ Database tables ready")
+
+    os.makedirs(settings.UPLOAD_DIRECTORY, exist_ok=True)
+    print(f"✅ Uploads directory ready: {settings.UPLOAD_DIRECTORY}")
+
+    if not settings.PINECONE_API_KEY:
+        print("WARNING: PINECONE_API_KEY not set!")
+    else:
+        print(f"Pinecone configured: {settings.PINECONE_INDEX_NAME}")
+
+    try:
+        await asyncio.to_thread(rag_service_from_app, app)
+        print("✅ RAG service ready")
+    except Exception as e:
+        print(f"WARNING: RAG service init failed, will retry on first use: {e}")
+
+    READY = True
+    print("Application startup complete!")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Kick init off in the background so the socket binds (and liveness
+    # probes pass) immediately; readiness gates on completion.
+    init_task = asyncio.create_task(_deferred_init(app))
+    yield
+    if not init_task.done():
+        init_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await init_task
 
 
 
@@ -18,61 +65,69 @@ app = FastAPI(
     description="AI-powered study assistant with RAG and Pinecone",
     docs_url="/docs",
     redoc_url="/redoc",
+    # orjson serializes large chat/search payloads several times faster
+    # than the stdlib encoder and handles datetimes natively.
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+
+class CatchAllExceptionMiddleware:
+    """
+    Last-resort 500 handler as a raw ASGI callable.
+
+    Operating at the ASGI layer skips BaseHTTPMiddleware's per-request
+    task/Request construction, and registering it *inside*
+    CORSMiddleware means error responses get CORS headers without the
+    old hand-rolled header merging.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def _send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception as exc:
+            if started:
+                # Response underway; nothing sane to send — re-raise.
+                raise
+            body = orjson.dumps({"detail": str(exc)})
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+
+
+# Added before CORSMiddleware so CORS sits outermost and decorates even
+# 500s from the catch-all. CORSMiddleware also owns OPTIONS preflights —
+# the old catch-all @app.options route double-handled them.
+app.add_middleware(CatchAllExceptionMiddleware)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in settings.ALLOWED_ORIGINS.split(",")] if settings.ALLOWED_ORIGINS else ["*"],
+    allow_origins=settings.allowed_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
-
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
-        status_code=500,
-        content={"detail": str(exc)},
-        headers={
-            "Access-Control-Allow-Origin": request.headers.get("origin", "*"),
-            "Access-Control-Allow-Credentials": "true",
-        }
-    )
-
-@app.options("/{rest_of_path:path}")
-async def preflight_handler(request: Request, rest_of_path: str):
-    return Response(
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": request.headers.get("origin", "*"),
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Allow-Credentials": "true",
-        }
-    )
-
-
-@app.on_event("startup")
-def on_startup():
-    """Initialize required directories and validate config."""
-    print("🚀 Starting up StudyAI API...")
-
-    init_db()
-    print("✅ Database tables ready")
-
-    os.makedirs(settings.UPLOAD_DIRECTORY, exist_ok=True)
-    print(f"✅ Uploads directory ready: {settings.UPLOAD_DIRECTORY}")
-
-    if not settings.PINECONE_API_KEY:
-        print("WARNING: PINECONE_API_KEY not set!")
-    else:
-        print(f"Pinecone configured: {settings.PINECONE_INDEX_NAME}")
-
-    print("Application startup complete!")
-
 
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX, tags=["Authentication"])
 app.include_router(documents.router, prefix=settings.API_V1_PREFIX, tags=["Documents"])
@@ -109,4 +164,18 @@ def health_check():
         "database": "connected",
         "vector_db": "pinecone",
         "message": "StudyAI API is running!"
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/health/live", tags=["Health"])
+def liveness_probe():
+    """Process is up and serving — answers as soon as the port binds."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+def readiness_probe():
+    """503 until deferred startup (DB tables, dirs, RAG) has finished."""
+    if not READY:
+        return ORJSONResponse(status_code=503, content={"status": "initializing"})
+    return {"status": "ready"}
\ No newline at end of file
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Index, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 from app.database import Base
@@ -14,28 +14,37 @@ class ProcessingStatus(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
-    
+    __table_args__ = (
+        # Matches the list query: WHERE user_id = ? (newest-first friendly)
+        Index("ix_doc_user_created", "user_id", "created_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the raw upload, for dedup
     title = Column(String, nullable=True)
     page_count = Column(Integer, nullable=True)
     
     status = Column(Enum(ProcessingStatus, values_callable=lambda x: [e.value for e in x]), default=ProcessingStatus.PENDING)
     processing_error = Column(Text, nullable=True)
-    extracted_text = Column(Text, nullable=True)
+    # Deferred: megabytes per row, wanted only by the /content endpoint —
+    # keeps every other documents query off the blob.
+    extracted_text = deferred(Column(Text, nullable=True))
     chunk_count = Column(Integer, default=0)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     processed_at = Column(DateTime, nullable=True)
     
     # Relationships
-    owner = relationship("User", back_populates="documents")  # ← matches User.documents
-    flashcards = relationship("Flashcard", back_populates="document", cascade="all, delete-orphan")
-    chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
+    # lazy="raise" turns accidental lazy loads (N+1) into errors; paths
+    # that need children (e.g. cascade delete) selectinload() them.
+    owner = relationship("User", back_populates="documents", lazy="raise")  # ← matches User.documents
+    flashcards = relationship("Flashcard", back_populates="document", cascade="all, delete-orphan", lazy="raise")
+    chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
         return f"<Document {self.filename}>"
\ No newline at end of file
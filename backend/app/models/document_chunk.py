@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Index, Integer, String, DateTime, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class DocumentChunk(Base):
-    
+
     __tablename__ = "document_chunks"
-    
+    __table_args__ = (
+        # Ordered scan for "all chunks of a document by chunk_index"
+        Index("ix_chunk_doc_order", "document_id", "chunk_index"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
@@ -17,9 +21,9 @@ class DocumentChunk(Base):
     
     #embedding_id = Column(String, nullable=True)  # ID of the embedding vector in the vector store
     
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.utcnow)
     
-    document = relationship("Document", back_populates="chunks")
+    document = relationship("Document", back_populates="chunks", lazy="raise")
     
     def __repr__(self):
         return f"<DocumentChunk id={self.id} document_id={self.document_id} chunk_index={self.chunk_index}>"
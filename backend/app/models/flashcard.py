@@ -1,12 +1,18 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, Text, DateTime, case, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, timezone
 from app.database import Base
 
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
-    
+    __table_args__ = (
+        # Due-cards query: WHERE user_id = ? AND next_review_date <= now
+        # ORDER BY next_review_date — index-only range scan, no sort node.
+        Index("ix_fc_user_due", "user_id", "next_review_date"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
@@ -28,18 +34,34 @@ class Flashcard(Base):
     last_reviewed_at = Column(DateTime, nullable=True)
     
     # Relationships
-    user = relationship("User", back_populates="flashcards")  # ← matches User.flashcards
-    document = relationship("Document", back_populates="flashcards")  # ← matches Document.flashcards
+    user = relationship("User", back_populates="flashcards", lazy="raise")  # ← matches User.flashcards
+    document = relationship("Document", back_populates="flashcards", lazy="raise")  # ← matches Document.flashcards
     
-    @property
+    # Hybrids: usable on instances and directly in WHERE/ORDER BY, so
+    # due-queue queries filter and rank server-side instead of loading
+    # every card and deciding in Python.
+
+    @hybrid_property
     def accuracy(self) -> float:
         if self.total_reviews == 0:
             return 0.0
         return (self.correct_reviews / self.total_reviews) * 100
-    
-    @property
+
+    @accuracy.expression
+    def accuracy(cls):
+        return case(
+            (cls.total_reviews == 0, 0.0),
+            else_=cls.correct_reviews * 100.0 / cls.total_reviews,
+        )
+
+    @hybrid_property
     def is_due(self) -> bool:
-        return datetime.now() >= self.next_review_date
+        return datetime.now(timezone.utc).replace(tzinfo=None) >= self.next_review_date
+
+    @is_due.expression
+    def is_due(cls):
+        # Columns store naive UTC; compare against UTC now server-side.
+        return cls.next_review_date <= func.timezone("utc", func.now())
     
     def __repr__(self):
         return f"<Flashcard {self.id}>"
\ No newline at end of file
@@ -20,7 +20,7 @@ class StudySession(Base):
     completed_at = Column(DateTime, nullable=True)
     
     # Relationships
-    user = relationship("User", back_populates="study_sessions") 
+    user = relationship("User", back_populates="study_sessions", lazy="raise")
     
     @property
     def accuracy(self) -> float:
@@ -19,14 +19,18 @@ class User(Base):
     # Profile
     full_name = Column(String, nullable=True)
     
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.now())
-    updated_at = Column(DateTime, default=datetime.now(), onupdate=datetime.now())
+    # Timestamps — pass the callable, not its result: datetime.now()
+    # here would be evaluated once at class definition, stamping every
+    # row with server-start time. utcnow keeps parity with the other models.
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships - ALL must match their counterparts!
-    documents = relationship("Document", back_populates="owner", cascade="all, delete-orphan")
-    flashcards = relationship("Flashcard", back_populates="user", cascade="all, delete-orphan")
-    study_sessions = relationship("StudySession", back_populates="user", cascade="all, delete-orphan")
+    # lazy="raise" makes accidental lazy loads (N+1) an error; eager-load
+    # explicitly with selectinload() where a path really needs them.
+    documents = relationship("Document", back_populates="owner", cascade="all, delete-orphan", lazy="raise")
+    flashcards = relationship("Flashcard", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    study_sessions = relationship("StudySession", back_populates="user", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
         return f"<User {self.email}>"
\ No newline at end of file
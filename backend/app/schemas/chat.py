@@ -66,7 +66,14 @@ class SearchRequest(BaseModel):
 
 
 class SearchResult(BaseModel):
-  
+
     content: str
     page: Optional[str]
-    document_id: Optional[int]
\ No newline at end of file
+    document_id: Optional[int]
+
+
+class SearchBatchRequest(BaseModel):
+    """Several searches resolved with one embedding call."""
+    queries: List[str] = Field(..., min_length=1, max_length=10)
+    document_id: Optional[int] = None
+    k: int = Field(default=5, ge=1, le=20)
\ No newline at end of file
@@ -32,6 +32,16 @@ class FlashcardReview(BaseModel):
     quality: Literal["again", "hard", "good", "easy"]
    
 
+class FlashcardBatchReviewItem(BaseModel):
+    flashcard_id: int
+    quality: Literal["again", "hard", "good", "easy"]
+
+
+class FlashcardBatchReview(BaseModel):
+    """Review many flashcards in one request (end of a study run)."""
+    reviews: List[FlashcardBatchReviewItem] = Field(..., min_length=1, max_length=500)
+
+
 class BulkFlashcardCreate(BaseModel):
     """Create multiple flashcards at once (from AI generation)."""
     document_id: int
@@ -2,8 +2,11 @@
 Authentication service — all auth business logic lives here.
 Routes delegate to this class and only handle HTTP concerns.
 """
+import asyncio
 from typing import Optional
-from sqlalchemy.orm import Session
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.schemas.user import UserCreate
@@ -17,43 +20,63 @@ class AuthService:
     so that callers (routes) control the HTTP response.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self._security = security_manager
 
-    def get_user_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.email == email))
 
-    def create_user(self, user_data: UserCreate) -> User:
+    async def create_user(self, user_data: UserCreate) -> User:
         """
         Register a new user.
         Raises ValueError if the email is already registered.
         """
-        if self.get_user_by_email(user_data.email):
+        if await self.get_user_by_email(user_data.email):
             raise ValueError("Email already registered")
 
+        # Password hashing is deliberately slow; run it off the event loop.
+        hashed = await asyncio.to_thread(
+            self._security.hash_password, user_data.password
+        )
         new_user = User(
             email=user_data.email,
-            hashed_password=self._security.hash_password(user_data.password),
+            hashed_password=hashed,
             full_name=user_data.full_name,
             is_active=True,
             is_verified=False,
         )
         self.db.add(new_user)
-        self.db.commit()
-        self.db.refresh(new_user)
+        await self.db.commit()
+        await self.db.refresh(new_user)
         return new_user
 
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """
         Verify credentials with constant-time comparison to prevent
         timing-based user enumeration attacks.
         Returns the User on success, None on failure.
         """
-        user = self.get_user_by_email(email)
+        user = await self.get_user_by_email(email)
         hash_to_check = user.hashed_password if user else self._security.get_dummy_hash()
-        if not self._security.verify_password(password, hash_to_check):
+        valid = await asyncio.to_thread(
+            self._security.verify_password, password, hash_to_check
+        )
+        if not valid:
             return None
+        if user is None:
+            # The dummy hash's plaintext is public source, so "valid"
+            # can be True here — still an unknown email, still a 401.
+            return None
+
+        # Lazy migration: successful login with a legacy bcrypt hash is
+        # the one moment we hold the plaintext, so upgrade to argon2id.
+        if self._security.needs_rehash(user.hashed_password):
+            user.hashed_password = await asyncio.to_thread(
+                self._security.hash_password, password
+            )
+            await self.db.commit()
+
         return user
 
     def create_token_for_user(self, user: User) -> str:
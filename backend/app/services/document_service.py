@@ -2,129 +2,226 @@
 Document service - business logic for document management.
 Senior Tip: Services contain business logic, keep routes thin.
 """
+import asyncio
+import hashlib
 import os
+import tempfile
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload, undefer
+from datetime import datetime, timezone
 
+from app.config import settings
 from app.models.document import Document, ProcessingStatus
 from app.models.document_chunk import DocumentChunk
 from app.models.user import User
-from app.services.pdf_service import PDFProcessor
+from app.services.pdf_service import PDFProcessor, aextract_pages_from_bytes
 from app.utils.chunking import PageAwareChunker
-from app.services.storage_service import StorageService
+from app.services.storage_service import StorageService, get_storage_service
+
+class UploadTooLargeError(ValueError):
+    """Upload body exceeded MAX_UPLOAD_SIZE — client error, maps to 413."""
+
+
+# Stateless helpers shared across requests — constructing them per
+# DocumentService (i.e. per request) wasted client/regex setup for no
+# isolation benefit.
+_pdf_processor = PDFProcessor()
+_chunker = PageAwareChunker(
+    chunk_size=1000,
+    chunk_overlap=200
+)
 
 
 class DocumentService:
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.pdf_processor = PDFProcessor()
-        self.chunker = PageAwareChunker(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
+        self.pdf_processor = _pdf_processor
+        self.chunker = _chunker
+
+    @staticmethod
+    async def read_upload(upload_file) -> tuple[tempfile.SpooledTemporaryFile, str]:
+        """
+        Spool the upload body, hashing as it goes.
+
+        Reads 1 MiB chunks via the async UploadFile API (no event-loop
+        blocking) — large buffers mean a 50 MB PDF costs ~50 read/write
+        pairs instead of ~800 — feeding each into SHA-256 while writing
+        to a spooled temp file — small uploads stay in memory, anything past 1 MiB
+        rolls over to disk, so peak RSS no longer scales with file size.
+        The digest is ready with no second pass over the data (OpenSSL
+        uses the CPU's SHA extensions where available). MAX_UPLOAD_SIZE
+        is enforced per chunk.
+
+        Returns:
+            (spooled_file, content_hash) — caller must close the file.
+
+        Raises:
+            UploadTooLargeError: if the file exceeds MAX_UPLOAD_SIZE.
+            ValueError: if the file is empty.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        sha256 = hashlib.sha256()
+        total = 0
+        try:
+            while chunk := await upload_file.read(1024 * 1024):
+                spool.write(chunk)
+                sha256.update(chunk)
+                total += len(chunk)
+                if total > settings.MAX_UPLOAD_SIZE:
+                    raise UploadTooLargeError("File size exceeds the maximum limit")
+
+            if total == 0:
+                raise ValueError("Uploaded file is empty")
+        except Exception:
+            spool.close()
+            raise
+
+        return spool, sha256.hexdigest()
 
     @staticmethod
-    def save_upload_file(upload_file, user_id: int) -> tuple[str, int]:
+    def save_upload_file(file_obj, user_id: int, filename: str) -> tuple[str, int]:
         """
-        Upload a file to Supabase Storage.
+        Stream an already-spooled upload to Supabase Storage.
 
         Returns:
             (storage_path, file_size)
         """
-        file_bytes = upload_file.file.read()
-        file_size = len(file_bytes)
+        # Spool position, not os.stat — the spool may still be in memory.
+        file_obj.seek(0, os.SEEK_END)
+        file_size = file_obj.tell()
 
-        storage_path = StorageService.build_storage_path(user_id, upload_file.filename)
-        storage = StorageService()
-        storage.upload(file_bytes, storage_path)
+        storage_path = StorageService.build_storage_path(user_id, filename)
+        get_storage_service().upload_stream(file_obj, storage_path)
 
         return storage_path, file_size
 
-    def create_document(
+    async def find_by_content_hash(self, user_id: int, content_hash: str) -> Optional[Document]:
+        """
+        Return the user's existing document with this content hash, if any.
+
+        Lets the upload route short-circuit duplicate uploads before
+        paying for storage and reprocessing. Failed documents don't
+        count — re-uploading those should retry.
+        """
+        return await self.db.scalar(
+            select(Document).where(
+                Document.user_id == user_id,
+                Document.content_hash == content_hash,
+                Document.status != ProcessingStatus.FAILED,
+            )
+        )
+
+    async def create_document(
         self,
         user: User,
         filename: str,
         file_path: str,
         file_size: int,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        content_hash: Optional[str] = None
     ) -> Document:
         document = Document(
             user_id=user.id,
             filename=filename,
             file_path=file_path,
             file_size=file_size,
+            content_hash=content_hash,
             title=title or filename,
             status=ProcessingStatus.PENDING
         )
 
         self.db.add(document)
-        self.db.commit()
-        self.db.refresh(document)
+        await self.db.commit()
+        await self.db.refresh(document)
 
         return document
 
-    def process_document(self, document_id: int) -> Document:
-        document = self.db.query(Document).filter(
-            Document.id == document_id
-        ).first()
+    async def process_document(self, document_id: int) -> Document:
+        document = await self.db.scalar(
+            select(Document).where(Document.id == document_id)
+        )
 
         if not document:
             raise ValueError(f"Document {document_id} not found")
 
         document.status = ProcessingStatus.PROCESSING
-        self.db.commit()
+        await self.db.commit()
 
-        tmp_path = None
         try:
-            # Download from Supabase Storage to a local temp file for processing
-            storage = StorageService()
-            tmp_path = storage.download_to_temp(document.file_path)
+            # Download straight into memory — no tmpfile write + re-read,
+            # nothing to unlink. The blocking fetch runs off the loop.
+            storage = get_storage_service()
+            pdf_bytes = await asyncio.to_thread(storage.download, document.file_path)
 
-            if not PDFProcessor.is_valid_pdf(tmp_path):
+            if not pdf_bytes.startswith(b"%PDF-"):
                 raise Exception("Invalid PDF file")
 
-            page_texts, page_count = self.pdf_processor.extract_text_by_pages(tmp_path)
-
-            full_text = "\n\n".join([text for _, text in page_texts])
-
-            chunks_with_pages = self.chunker.chunk_with_pages(page_texts)
-
-            for idx, (chunk_text, page_num) in enumerate(chunks_with_pages):
-                chunk = DocumentChunk(
-                    document_id=document.id,
-                    chunk_index=idx,
-                    content=chunk_text,
-                    page_number=page_num
-                )
-                self.db.add(chunk)
-
-            document.extracted_text = full_text
+            # CPU-bound parse fans page ranges out across the process
+            # pool, so one big document uses every core instead of one.
+            # Each range is chunked (in a worker thread) the moment its
+            # extraction finishes, overlapping the two pipeline stages;
+            # chunk_with_pages is per-page, so per-range output pasted
+            # back together in page order is identical to one big call.
+            async def chunk_range(pages):
+                return await asyncio.to_thread(self.chunker.chunk_with_pages, pages)
+
+            page_texts, page_count, range_chunks = await aextract_pages_from_bytes(
+                pdf_bytes, range_consumer=chunk_range
+            )
+            chunks_with_pages = [
+                chunk for chunks in range_chunks for chunk in chunks
+            ]
+
+            # Replace, don't append: a reprocess would otherwise leave
+            # stale chunks behind and desync chunk_count from reality.
+            # Delete + insert + counter update commit atomically below.
+            await self.db.execute(
+                delete(DocumentChunk).where(DocumentChunk.document_id == document.id)
+            )
+
+            # Single executemany INSERT instead of one ORM flush per
+            # chunk — the unit-of-work overhead dominates on large PDFs.
+            rows = [
+                {
+                    "document_id": document.id,
+                    "chunk_index": idx,
+                    "content": chunk_text,
+                    "page_number": page_num,
+                }
+                for idx, (chunk_text, page_num) in enumerate(chunks_with_pages)
+            ]
+            if rows:
+                await self.db.execute(insert(DocumentChunk), rows)
+
+            # Chunks are the source of truth for RAG; the concatenated
+            # text is only stored when explicitly asked for, since it
+            # duplicates the whole document into one TOASTed column.
+            if settings.STORE_FULL_TEXT:
+                document.extracted_text = "\n\n".join(text for _, text in page_texts)
             document.page_count = page_count
             document.chunk_count = len(chunks_with_pages)
             document.status = ProcessingStatus.COMPLETED
-            document.processed_at = datetime.utcnow()
+            document.processed_at = datetime.now(timezone.utc).replace(tzinfo=None)
             document.processing_error = None
 
-            self.db.commit()
-            self.db.refresh(document)
+            await self.db.commit()
+            await self.db.refresh(document)
 
             return document
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             document.status = ProcessingStatus.FAILED
             document.processing_error = str(e)
-            self.db.commit()
+            await self.db.commit()
 
             raise Exception(f"Failed to process document: {e}")
 
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
-    def get_user_documents(
+    async def get_user_documents(
         self,
         user_id: int,
         skip: int = 0,
@@ -133,24 +230,89 @@ class DocumentService:
         """
         Get all documents for a user with pagination.
 
+        Loads only the columns DocumentResponse serializes — in particular
+        it skips extracted_text, which can be megabytes per row.
+
         Senior Tip: Always paginate list endpoints.
         """
-        return self.db.query(Document).filter(
+        stmt = select(Document).options(
+            load_only(
+                Document.id, Document.user_id, Document.filename,
+                Document.file_path, Document.file_size, Document.title,
+                Document.page_count, Document.status,
+                Document.processing_error, Document.chunk_count,
+                Document.created_at, Document.processed_at,
+            )
+        ).where(
             Document.user_id == user_id
-        ).offset(skip).limit(limit).all()
+        ).offset(skip).limit(limit)
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_document_status(
+        self,
+        document_id: int,
+        user_id: int
+    ) -> Optional[ProcessingStatus]:
+        """
+        Get only a document's processing status (ownership-checked).
 
-    def get_document(self, document_id: int, user_id: int) -> Optional[Document]:
+        Loads a single column instead of the full row — use this on hot
+        paths like chat that only need to know the document is ready.
+        """
+        return await self.db.scalar(
+            select(Document.status).where(
+                Document.id == document_id,
+                Document.user_id == user_id
+            )
+        )
+
+    async def get_document(
+        self,
+        document_id: int,
+        user_id: int,
+        with_content: bool = False
+    ) -> Optional[Document]:
         """
         Get a specific document if user owns it.
 
+        extracted_text is deferred at the model level; pass
+        with_content=True to undefer it (the /content endpoint does).
+
         Senior Tip: Always verify ownership in services.
         """
-        return self.db.query(Document).filter(
+        stmt = select(Document).where(
             Document.id == document_id,
             Document.user_id == user_id
-        ).first()
+        )
+        if with_content:
+            stmt = stmt.options(undefer(Document.extracted_text))
+        document = await self.db.scalar(stmt)
+
+        if (
+            with_content
+            and document is not None
+            and document.extracted_text is None
+            and document.status == ProcessingStatus.COMPLETED
+        ):
+            # Full text wasn't persisted (STORE_FULL_TEXT off) —
+            # rebuild it from the chunks for this response only.
+            # set_committed_value keeps the session from treating the
+            # reconstruction as a pending UPDATE.
+            result = await self.db.execute(
+                select(DocumentChunk.content)
+                .where(DocumentChunk.document_id == document.id)
+                .order_by(DocumentChunk.chunk_index)
+            )
+            set_committed_value(
+                document,
+                "extracted_text",
+                "\n\n".join(result.scalars()),
+            )
 
-    def get_document_chunks(
+        return document
+
+    async def get_document_chunks(
         self,
         document_id: int,
         user_id: int
@@ -158,52 +320,65 @@ class DocumentService:
         """
         Get all chunks for a document.
 
-        Senior Tip: Verify user owns document before returning chunks.
+        Ownership check and chunk load are folded into one join — an
+        empty result means not-found (or simply no chunks), either way
+        there is nothing to return. Half the round-trips of the old
+        check-then-fetch pair.
         """
-        document = self.get_document(document_id, user_id)
-        if not document:
-            return []
-
-        return self.db.query(DocumentChunk).filter(
-            DocumentChunk.document_id == document_id
-        ).order_by(DocumentChunk.chunk_index).all()
+        result = await self.db.execute(
+            select(DocumentChunk).join(Document).where(
+                Document.id == document_id,
+                Document.user_id == user_id
+            ).order_by(DocumentChunk.chunk_index)
+        )
+        return result.scalars().all()
 
-    def delete_document(self, document_id: int, user_id: int) -> bool:
+    async def delete_document(self, document_id: int, user_id: int) -> bool:
         """
         Delete document record and its file from Supabase Storage.
 
         Returns:
             True if deleted, False if not found
         """
-        document = self.get_document(document_id, user_id)
+        # Eager-load children in two batched SELECTs so the delete-orphan
+        # cascade doesn't trip the models' lazy="raise" policy.
+        document = await self.db.scalar(
+            select(Document).options(
+                selectinload(Document.chunks),
+                selectinload(Document.flashcards),
+            ).where(
+                Document.id == document_id,
+                Document.user_id == user_id
+            )
+        )
         if not document:
             return False
 
         try:
-            storage = StorageService()
-            storage.delete(document.file_path)
+            storage = get_storage_service()
+            await asyncio.to_thread(storage.delete, document.file_path)
         except Exception as e:
             print(f"Failed to delete file from storage: {e}")
 
-        self.db.delete(document)
-        self.db.commit()
+        await self.db.delete(document)
+        await self.db.commit()
 
         return True
 
-    def update_document_title(
+    async def update_document_title(
         self,
         document_id: int,
         user_id: int,
         new_title: str
     ) -> Optional[Document]:
         """Update document title."""
-        document = self.get_document(document_id, user_id)
+        document = await self.get_document(document_id, user_id)
         if not document:
             return None
 
         document.title = new_title
-        self.db.commit()
-        self.db.refresh(document)
+        await self.db.commit()
+        await self.db.refresh(document)
 
         return document
 
@@ -0,0 +1,86 @@
+"""
+Persistent embedding cache keyed by content hash.
+
+Re-uploading a PDF (or sharing chunks across documents) used to re-embed
+every chunk through the OpenAI API. Embeddings are deterministic per
+(text, model), so a small SQLite file keyed by SHA-256(model + text)
+turns those repeats into local reads — no API call, no network latency.
+
+Vectors are stored as float16: ada-002 components sit well inside
+fp16's range, the recall impact on cosine similarity is negligible,
+and it halves the cache's disk and I/O footprint (3 KB/vector vs 6 KB).
+
+Senior Tip: stdlib sqlite3 is plenty here — one table, primary-key
+lookups, no server to run. Vectors round-trip through numpy bytes.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+# SQLite caps host parameters per statement; stay under the old 999 limit.
+_SELECT_BATCH = 500
+
+
+class EmbeddingCache:
+    """SQLite-backed map of sha256(model + text) -> embedding vector."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.path.join(settings.UPLOAD_DIRECTORY, "embedding_cache.db")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # check_same_thread=False + a lock: callers hop threads via
+        # asyncio.to_thread, and sqlite3 connections aren't thread-safe.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, vec BLOB)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def key(text: str, model: str) -> bytes:
+        """Cache key: model is part of the hash so model bumps never collide."""
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Fetch all cached vectors for the given keys in batched SELECTs."""
+        found: Dict[bytes, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _SELECT_BATCH):
+                batch = keys[start:start + _SELECT_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE hash IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(float).tolist()
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, List[float]]]) -> None:
+        """Write vectors back after an API round-trip (idempotent upsert)."""
+        rows = [
+            (key, np.asarray(vec, dtype=np.float16).tobytes())
+            for key, vec in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache instance (one connection, shared lock)."""
+    return EmbeddingCache()
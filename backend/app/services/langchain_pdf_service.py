@@ -1,6 +1,8 @@
 
+import asyncio
+import functools
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -8,6 +10,19 @@ from langchain_pinecone import PineconeVectorStore
 from langchain.schema import Document as LangchainDocument
 from pinecone import Pinecone
 from app.config import settings
+from app.services.embedding_cache import get_embedding_cache
+from app.services.pinecone_service import EMBEDDING_DIMENSION
+from app.utils.chunking import DEFAULT_SEPARATORS
+from app.utils.http_client import get_async_http_client, get_http_client
+
+# OpenAI caps embedding requests at 2048 inputs; Pinecone recommends
+# upserting ~100 vectors per call to stay under message-size limits.
+EMBED_BATCH_SIZE = 2048
+UPSERT_BATCH_SIZE = 100
+
+# In-flight request cap for concurrent ingestion — enough to hide
+# round-trip latency without tripping OpenAI/Pinecone rate limits.
+MAX_CONCURRENT_BATCHES = 5
 
 
 class LangChainPDFService:
@@ -18,20 +33,19 @@ class LangChainPDFService:
         # and good enough for educational content
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-ada-002",
-            api_key=settings.OPENAI_API_KEY
+            api_key=settings.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client()
         )
+        # Query embeddings repeat a lot (suggested questions, retries) —
+        # memoize in-process on top of the persistent chunk cache.
+        self.embed_query = functools.lru_cache(maxsize=4096)(self.embeddings.embed_query)
 
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,         # ~250 tokens per chunk
             chunk_overlap=200,       # Overlap to preserve context
             length_function=len,
-            separators=[
-                "\n\n",   # Try splitting on double newlines first (paragraphs)
-                "\n",     # Then single newlines
-                ". ",     # Then sentences
-                " ",      # Then words
-                ""        # Last resort: characters
-            ]
+            separators=DEFAULT_SEPARATORS,
         )
 
         # Initialize Pinecone client once and reuse the index connection
@@ -73,6 +87,38 @@ class LangChainPDFService:
 
         return chunks
 
+    def split_pdf_soa(
+        self,
+        pdf_path: str,
+        document_id: int,
+        user_id: int
+    ) -> Tuple[List[str], List[Dict]]:
+        """
+        Load and split a PDF into parallel (texts, metas) lists.
+
+        Structure-of-arrays counterpart of load_and_split_pdf: the
+        ingestion pipeline only ever needs the text list (for batch
+        embedding) and the metadata list (for the upsert), so nothing
+        downstream has to walk thousands of Document objects pulling
+        attributes one at a time. Documents are only materialized at
+        boundaries where LangChain APIs demand them.
+        """
+        pages = PyPDFLoader(pdf_path).load()
+
+        texts: List[str] = []
+        metas: List[Dict] = []
+        for page in pages:
+            base_meta = {
+                **page.metadata,
+                "document_id": document_id,
+                "user_id": user_id,
+            }
+            for piece in self.text_splitter.split_text(page.page_content):
+                texts.append(piece)
+                metas.append(base_meta)
+
+        return texts, metas
+
     def get_vectorstore(self, user_id: int) -> PineconeVectorStore:
       
         return PineconeVectorStore(
@@ -87,14 +133,167 @@ class LangChainPDFService:
         user_id: int,
         document_id: int
     ) -> int:
+        """
+        Embed chunks and upsert them to Pinecone, explicitly batched.
+
+        One embeddings request per 2048 chunks instead of whatever the
+        vectorstore wrapper decides — a 400-chunk document is a single
+        HTTP round-trip to OpenAI plus four upserts, not hundreds of
+        sequential calls.
+        """
+        texts = [c.page_content for c in chunks]
+        metas = [c.metadata for c in chunks]
+        return self.embed_and_store_soa(texts, metas, user_id, document_id)
 
-        if not chunks:
+    def embed_and_store_soa(
+        self,
+        texts: List[str],
+        metas: List[Dict],
+        user_id: int,
+        document_id: int
+    ) -> int:
+        """SoA core of embed_and_store — operates on parallel lists."""
+        if not texts:
             return 0
 
-        vectorstore = self.get_vectorstore(user_id)
-        vectorstore.add_documents(chunks)
+        keys, cached, miss_idx = self._split_cached(texts)
+
+        miss_vectors = []
+        miss_texts = [texts[i] for i in miss_idx]
+        for start in range(0, len(miss_texts), EMBED_BATCH_SIZE):
+            miss_vectors.extend(
+                self.embeddings.embed_documents(miss_texts[start:start + EMBED_BATCH_SIZE])
+            )
+
+        vectors = self._merge_cached(keys, cached, miss_idx, miss_vectors)
+        payload = self._build_vectors(texts, metas, vectors, user_id, document_id)
+        namespace = f"user_{user_id}"
+        for start in range(0, len(payload), UPSERT_BATCH_SIZE):
+            self._index.upsert(
+                vectors=payload[start:start + UPSERT_BATCH_SIZE],
+                namespace=namespace,
+            )
 
-        return len(chunks)
+        return len(texts)
+
+    async def aembed_and_store(
+        self,
+        chunks: List[LangchainDocument],
+        user_id: int,
+        document_id: int
+    ) -> int:
+        """
+        Async embed_and_store: all embedding batches go out concurrently
+        (bounded at MAX_CONCURRENT_BATCHES in flight), then the upserts
+        do the same. Latency approaches one round-trip per concurrency
+        slot instead of one per batch.
+        """
+        texts = [c.page_content for c in chunks]
+        metas = [c.metadata for c in chunks]
+        return await self.aembed_and_store_soa(texts, metas, user_id, document_id)
+
+    async def aembed_and_store_soa(
+        self,
+        texts: List[str],
+        metas: List[Dict],
+        user_id: int,
+        document_id: int
+    ) -> int:
+        """SoA core of aembed_and_store — operates on parallel lists."""
+        if not texts:
+            return 0
+
+        sem = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with sem:
+                return await self.embeddings.aembed_documents(batch)
+
+        keys, cached, miss_idx = await asyncio.to_thread(self._split_cached, texts)
+
+        miss_texts = [texts[i] for i in miss_idx]
+        batches = [
+            miss_texts[start:start + EMBED_BATCH_SIZE]
+            for start in range(0, len(miss_texts), EMBED_BATCH_SIZE)
+        ]
+        miss_vectors = [
+            vec
+            for batch_vectors in await asyncio.gather(*(embed_batch(b) for b in batches))
+            for vec in batch_vectors
+        ]
+
+        vectors = await asyncio.to_thread(
+            self._merge_cached, keys, cached, miss_idx, miss_vectors
+        )
+        payload = self._build_vectors(texts, metas, vectors, user_id, document_id)
+        namespace = f"user_{user_id}"
+
+        async def upsert_batch(batch: List[tuple]) -> None:
+            # The Pinecone client is sync/blocking — run it off the loop.
+            async with sem:
+                await asyncio.to_thread(
+                    self._index.upsert, vectors=batch, namespace=namespace
+                )
+
+        await asyncio.gather(*(
+            upsert_batch(payload[start:start + UPSERT_BATCH_SIZE])
+            for start in range(0, len(payload), UPSERT_BATCH_SIZE)
+        ))
+
+        return len(texts)
+
+    def _split_cached(self, texts: List[str]):
+        """
+        Partition texts into cache hits and misses.
+
+        Returns (keys, cached {key: vector}, indexes still needing the
+        embeddings API). Hits skip the API entirely.
+        """
+        cache = get_embedding_cache()
+        keys = [cache.key(text, self.embeddings.model) for text in texts]
+        cached = cache.get_many(keys)
+        miss_idx = [i for i, key in enumerate(keys) if key not in cached]
+        return keys, cached, miss_idx
+
+    @staticmethod
+    def _merge_cached(keys, cached, miss_idx, miss_vectors) -> List[List[float]]:
+        """Recombine cached and fresh vectors in chunk order; write back misses."""
+        fresh = dict(zip(miss_idx, miss_vectors))
+        get_embedding_cache().put_many(
+            (keys[i], vec) for i, vec in fresh.items()
+        )
+        return [
+            fresh[i] if i in fresh else cached[keys[i]]
+            for i in range(len(keys))
+        ]
+
+    @staticmethod
+    def _build_vectors(
+        texts: List[str],
+        metas: List[Dict],
+        vectors: List[List[float]],
+        user_id: int,
+        document_id: int
+    ) -> List[tuple]:
+        """
+        Zip the parallel lists into Pinecone upsert tuples.
+
+        The "text" metadata key is what PineconeVectorStore reads back
+        at query time, so retrieval keeps working against these vectors.
+        """
+        return [
+            (
+                f"doc{document_id}_chunk{i}",
+                vec,
+                {
+                    **meta,
+                    "text": text,
+                    "document_id": document_id,
+                    "user_id": user_id,
+                },
+            )
+            for i, (text, meta, vec) in enumerate(zip(texts, metas, vectors))
+        ]
 
     def delete_document_vectors(
         self,
@@ -115,17 +314,18 @@ class LangChainPDFService:
             return False
 
     def get_chunk_count(self, user_id: int, document_id: int) -> int:
-        """Get number of vectors stored for a document."""
+        """
+        Get number of vectors stored in the user's namespace.
+
+        describe_index_stats is a metadata lookup — the old top_k=10000
+        zero-vector query forced an ANN scan of the whole namespace just
+        to count. Serverless indexes can't filter stats by metadata, so
+        this is a namespace-level count; the authoritative per-document
+        figure is Document.chunk_count in the database.
+        """
         try:
-            # Query with a zero vector and metadata filter to count matches
-            # text-embedding-3-small produces 1536-dimensional vectors
-            results = self._index.query(
-                vector=[0.0] * 1536,
-                filter={"document_id": document_id},
-                namespace=f"user_{user_id}",
-                top_k=10000,
-                include_values=False
-            )
-            return len(results.matches)
+            stats = self._index.describe_index_stats()
+            namespace_stats = stats.get("namespaces", {}).get(f"user_{user_id}", {})
+            return namespace_stats.get("vector_count", 0)
         except Exception:
             return 0
@@ -2,19 +2,43 @@
 PDF processing service for text extraction.
 Senior Tip: PDFs are tricky - try multiple libraries for best results.
 """
+import asyncio
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple
 from pypdf import PdfReader
+import fitz  # PyMuPDF
 import pdfplumber
 
+# Process pool for extraction: parsing is pure-Python CPU that holds the
+# GIL for seconds per document, so a threadpool can't overlap it.
+# Created lazily — workers that never parse a PDF shouldn't fork one.
+_pdf_pool: ProcessPoolExecutor = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pdf_pool
+
+
+def _open_fitz(pdf_source) -> "fitz.Document":
+    """Open a PyMuPDF document from a path or a binary file-like object."""
+    if hasattr(pdf_source, "read"):
+        pdf_source.seek(0)
+        return fitz.open(stream=pdf_source.read(), filetype="pdf")
+    return fitz.open(pdf_source)
+
 
 class PDFProcessor:
     """
     Handle PDF text extraction with fallback strategies.
 
     Senior Tips:
-    - PyPDF2: Fast but sometimes misses formatting
-    - pdfplumber: Better with tables and complex layouts
+    - PyMuPDF: C-backed MuPDF, by far the fastest — primary path
+    - pdfplumber: Better with tables and complex layouts — fallback
     - Always try multiple methods for best results
     """
 
@@ -22,67 +46,153 @@ class PDFProcessor:
         pass
 
     @staticmethod
-    def is_valid_pdf(file_path: str) -> bool:
+    def is_valid_pdf(pdf_source) -> bool:
         """
         Validate a PDF by checking its magic-byte header.
-        Static because it needs no instance state.
+        Accepts a filesystem path or a binary file-like object.
         Senior Tip: Always validate before processing.
         """
-        if not os.path.exists(file_path):
+        if hasattr(pdf_source, "read"):
+            pos = pdf_source.tell()
+            header = pdf_source.read(5)
+            pdf_source.seek(pos)
+            return header == b'%PDF-'
+        if not os.path.exists(pdf_source):
             return False
         try:
-            with open(file_path, 'rb') as f:
+            with open(pdf_source, 'rb') as f:
                 return f.read(5) == b'%PDF-'
         except Exception:
             return False
 
-    def extract_text(self, pdf_path: str) -> Tuple[str, int]:
+    def extract_text(self, pdf_source) -> Tuple[str, int]:
         try:
-            text, pages = self._extract_with_pdfplumber(pdf_path)
+            text, pages = self._extract_with_pymupdf(pdf_source)
             if text and len(text) > 100:  # Verify we got meaningful text
                 return text, pages
+        except Exception as e:
+            print(f"PyMuPDF failed: {e}, trying pdfplumber...")
+
+        try:
+            text, pages = self._extract_with_pdfplumber(pdf_source)
+            if text and len(text) > 100:
+                return text, pages
         except Exception as e:
             print(f"pdfplumber failed: {e}, trying PyPDF2...")
 
         # Fallback to PyPDF2
         try:
-            text, pages = self._extract_with_pypdf2(pdf_path)
+            text, pages = self._extract_with_pypdf2(pdf_source)
             return text, pages
         except Exception as e:
             raise Exception(f"All PDF extraction methods failed: {e}")
 
     def extract_text_by_pages(
         self,
-        pdf_path: str
+        pdf_source
     ) -> Tuple[List[Tuple[int, str]], int]:
         """
         Extract text page-by-page for better chunking.
 
         Args:
-            pdf_path: Path to PDF file
+            pdf_source: Path to a PDF file, or a binary file-like object
+                        (both pdfplumber and pypdf accept either).
 
         Returns:
             Tuple of ([(page_num, text), ...], total_pages)
 
         Senior Tip: Page-aware extraction helps with citations.
         """
-        page_texts = []
-
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    page_texts.append((i + 1, text))
-
-                return page_texts, len(pdf.pages)
+            page_texts, retry_pages, total = self._pages_with_pymupdf(pdf_source)
+            if retry_pages:
+                # Re-extract only pages MuPDF got nothing from with the
+                # slower, layout-aware library.
+                if hasattr(pdf_source, "seek"):
+                    pdf_source.seek(0)
+                with pdfplumber.open(pdf_source) as pdf:
+                    for i in retry_pages:
+                        text = pdf.pages[i].extract_text() or ""
+                        if text:
+                            page_texts[i] = (i + 1, text)
+            return page_texts, total
 
         except Exception as e:
             print(f"Page-by-page extraction failed: {e}")
             # Fallback: extract all at once
-            text, pages = self.extract_text(pdf_path)
+            text, pages = self.extract_text(pdf_source)
             return [(1, text)], pages
 
-    def _extract_with_pdfplumber(self, pdf_path: str) -> Tuple[str, int]:
+    @staticmethod
+    def _page_may_have_tables(page) -> bool:
+        """
+        Cheap columnar-structure check before paying for find_tables.
+
+        Three or more text blocks starting in the same horizontal band
+        is what aligned columns look like; prose pages almost never do
+        this, so they skip table detection entirely.
+        """
+        rows = {}
+        for block in page.get_text("blocks"):
+            band = round(block[1] / 10)  # y0 bucketed to ~10pt bands
+            rows[band] = rows.get(band, 0) + 1
+            if rows[band] >= 3:
+                return True
+        return False
+
+    def _page_text_with_tables(self, page) -> str:
+        """
+        Text plus table text for one already-parsed PyMuPDF page.
+
+        Tables come from the parsed page via find_tables — no second
+        library, no content-stream re-parse — and only pages whose
+        block layout looks columnar pay for detection at all.
+        """
+        text = page.get_text("text") or ""
+        if self._page_may_have_tables(page):
+            try:
+                tables = page.find_tables().tables
+            except Exception:
+                tables = []
+            for table in tables:
+                table_text = self._table_to_text(table.extract())
+                if table_text:
+                    text = f"{text}\n\n{table_text}" if text else table_text
+        return text
+
+    def _pages_with_pymupdf(
+        self,
+        pdf_source
+    ) -> Tuple[List[Tuple[int, str]], List[int], int]:
+        """
+        Per-page extraction via PyMuPDF, text and tables in one parse.
+
+        Returns ([(page_num, text), ...], indexes needing the pdfplumber
+        fallback, total_pages). Only pages MuPDF extracts nothing from
+        go to the fallback list.
+        """
+        page_texts = []
+        retry_pages = []
+        with _open_fitz(pdf_source) as doc:
+            for i, page in enumerate(doc):
+                text = self._page_text_with_tables(page)
+                page_texts.append((i + 1, text))
+                if not text.strip():
+                    retry_pages.append(i)
+            return page_texts, retry_pages, len(doc)
+
+    def _extract_with_pymupdf(self, pdf_source) -> Tuple[str, int]:
+        """
+        Extract using PyMuPDF (C-backed, 5-20x faster than pdfplumber).
+        """
+        with _open_fitz(pdf_source) as doc:
+            text_parts = [page.get_text("text") for page in doc]
+            page_count = len(doc)
+
+        full_text = "\n\n".join(part for part in text_parts if part)
+        return full_text, page_count
+
+    def _extract_with_pdfplumber(self, pdf_source) -> Tuple[str, int]:
         """
         Extract using pdfplumber (handles tables better).
 
@@ -90,7 +200,9 @@ class PDFProcessor:
         """
         text_parts = []
 
-        with pdfplumber.open(pdf_path) as pdf:
+        if hasattr(pdf_source, "seek"):
+            pdf_source.seek(0)
+        with pdfplumber.open(pdf_source) as pdf:
             page_count = len(pdf.pages)
 
             for page in pdf.pages:
@@ -107,7 +219,7 @@ class PDFProcessor:
         full_text = "\n\n".join(text_parts)
         return full_text, page_count
 
-    def _extract_with_pypdf2(self, pdf_path: str) -> Tuple[str, int]:
+    def _extract_with_pypdf2(self, pdf_source) -> Tuple[str, int]:
         """
         Extract using PyPDF2 (faster but simpler).
 
@@ -115,14 +227,17 @@ class PDFProcessor:
         """
         text_parts = []
 
-        with open(pdf_path, 'rb') as file:
-            reader = PdfReader(file)
-            page_count = len(reader.pages)
+        if hasattr(pdf_source, "seek"):
+            pdf_source.seek(0)
+            reader = PdfReader(pdf_source)
+        else:
+            reader = PdfReader(pdf_source)
+        page_count = len(reader.pages)
 
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                text_parts.append(text)
 
         full_text = "\n\n".join(text_parts)
         return full_text, page_count
@@ -163,6 +278,119 @@ class PDFProcessor:
             return {"page_count": 0}
 
 
+def extract_pages_from_bytes(data: bytes) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    Process-pool entry point for page extraction.
+
+    Takes raw bytes (which pickle cheaply across the pool boundary,
+    unlike file objects) and parses from an in-memory buffer.
+    """
+    return PDFProcessor().extract_text_by_pages(io.BytesIO(data))
+
+
+# Pages per pool task when fanning a document out across workers.
+PAGE_RANGE_SIZE = 8
+
+# Below this the fork/pickle overhead outweighs parallel extraction.
+MIN_PAGES_FOR_FANOUT = 4
+
+
+def count_pages_from_bytes(data: bytes) -> int:
+    """Cheap page count (xref only) without extracting any text."""
+    return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def extract_page_range_from_bytes(
+    data: bytes, start: int, end: int
+) -> Tuple[List[Tuple[int, str]], List[int]]:
+    """
+    Extract pages [start, end) — pool worker for parallel extraction.
+
+    Each worker re-opens the document from its own copy of the bytes,
+    so ranges are fully independent across processes. Runs the same
+    per-page logic as the small-document path — table text included,
+    zero-text pages reported back as indexes for the pdfplumber retry.
+    """
+    processor = PDFProcessor()
+    page_texts = []
+    retry_pages = []
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for i in range(start, min(end, len(doc))):
+            text = processor._page_text_with_tables(doc[i])
+            page_texts.append((i + 1, text))
+            if not text.strip():
+                retry_pages.append(i)
+    return page_texts, retry_pages
+
+
+def retry_pages_from_bytes(data: bytes, indexes: List[int]) -> List[Tuple[int, str]]:
+    """
+    pdfplumber pass over pages MuPDF extracted nothing from — pool
+    worker, called only when a range reports zero-text pages.
+    """
+    results = []
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for i in indexes:
+            text = pdf.pages[i].extract_text() or ""
+            if text:
+                results.append((i + 1, text))
+    return results
+
+
+async def aextract_pages_from_bytes(data: bytes, range_consumer=None):
+    """
+    Parallel page extraction: split the document into page ranges,
+    run them across the process pool, reassemble in page order.
+
+    Short documents skip the fan-out — one worker, one pickle.
+
+    range_consumer, if given, is an async callable invoked with each
+    range's [(page_num, text), ...] as soon as that worker finishes —
+    downstream work (chunking) overlaps with extraction still in
+    flight instead of waiting for the last range. With a consumer the
+    return is (page_texts, page_count, consumer_results) with results
+    in page order; without, (page_texts, page_count).
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pdf_pool()
+
+    try:
+        page_count = await asyncio.to_thread(count_pages_from_bytes, data)
+    except Exception:
+        page_count = 0
+
+    if page_count < MIN_PAGES_FOR_FANOUT:
+        page_texts, page_count = await loop.run_in_executor(
+            pool, extract_pages_from_bytes, data
+        )
+        if range_consumer is None:
+            return page_texts, page_count
+        return page_texts, page_count, [await range_consumer(page_texts)]
+
+    async def run_range(start: int):
+        part, retry_idx = await loop.run_in_executor(
+            pool, extract_page_range_from_bytes, data, start, start + PAGE_RANGE_SIZE
+        )
+        if retry_idx:
+            # Same fallback as the small-document path, resolved before
+            # the consumer sees the range so downstream chunking never
+            # works from a page the retry would have filled in.
+            retried = dict(await loop.run_in_executor(
+                pool, retry_pages_from_bytes, data, retry_idx
+            ))
+            part = [(num, retried.get(num, text)) for num, text in part]
+        consumed = await range_consumer(part) if range_consumer else None
+        return part, consumed
+
+    results = await asyncio.gather(*(
+        run_range(start) for start in range(0, page_count, PAGE_RANGE_SIZE)
+    ))
+    page_texts = [page for part, _ in results for page in part]
+    if range_consumer is None:
+        return page_texts, page_count
+    return page_texts, page_count, [consumed for _, consumed in results]
+
+
 # Backward-compatible alias — callers importing is_valid_pdf directly continue to work
 def is_valid_pdf(file_path: str) -> bool:
     return PDFProcessor.is_valid_pdf(file_path)
@@ -7,14 +7,26 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Optional
+from typing import Dict, List, Optional
+import threading
 import time
 
 from app.config import settings
+from app.utils.chunking import DEFAULT_SEPARATORS
+
+# Geometry of the index; must match the embedding model
+# (text-embedding-ada-002 produces 1536-dim vectors).
+EMBEDDING_DIMENSION = 1536
+INDEX_METRIC = "cosine"
 
 
 class PineconeService:
 
+    # Index names this process has already confirmed with the control
+    # plane — list_indexes/describe_index cost a network round trip and
+    # the answer doesn't change mid-run.
+    _indexes_verified: set = set()
+
     def __init__(self):
         """Initialize Pinecone connection."""
         self.api_key = settings.PINECONE_API_KEY
@@ -28,6 +40,12 @@ class PineconeService:
 
         self._ensure_index_exists()
 
+        # One index handle and one vectorstore per namespace for the
+        # service's lifetime — constructing these per request repeated
+        # the control-plane handshake and connection setup every call.
+        self._index = self.pc.Index(self.index_name)
+        self._vectorstores: Dict[int, PineconeVectorStore] = {}
+
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-ada-002",
             openai_api_key=settings.OPENAI_API_KEY
@@ -36,6 +54,9 @@ class PineconeService:
         print(f"✅ Pinecone initialized: index={self.index_name}")
 
     def _ensure_index_exists(self):
+        if self.index_name in PineconeService._indexes_verified:
+            return
+
         existing_indexes = [idx.name for idx in self.pc.list_indexes()]
 
         if self.index_name not in existing_indexes:
@@ -43,8 +64,8 @@ class PineconeService:
 
             self.pc.create_index(
                 name=self.index_name,
-                dimension=1536,
-                metric="cosine",
+                dimension=EMBEDDING_DIMENSION,
+                metric=INDEX_METRIC,
                 spec=ServerlessSpec(
                     cloud="aws",
                     region=self.environment
@@ -58,6 +79,8 @@ class PineconeService:
         else:
             print(f"✅ Using existing index: {self.index_name}")
 
+        PineconeService._indexes_verified.add(self.index_name)
+
     def load_and_split_pdf(self, pdf_path: str) -> List[dict]:
         loader = PyPDFLoader(pdf_path)
         documents = loader.load()
@@ -65,7 +88,7 @@ class PineconeService:
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=DEFAULT_SEPARATORS
         )
 
         chunks = text_splitter.split_documents(documents)
@@ -81,21 +104,22 @@ class PineconeService:
     ) -> int:
         print(f"🧠 Generating embeddings and storing in Pinecone...")
 
-        for i, chunk in enumerate(chunks):
-            chunk.metadata.update({
-                "user_id": user_id,
-                "document_id": document_id,
-                "chunk_index": i
-            })
-
         namespace = f"user_{user_id}"
 
-        PineconeVectorStore.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            index_name=self.index_name,
-            namespace=namespace
-        )
+        # Merged metadata dicts built up front; add_texts takes the
+        # parallel lists directly, so the source Documents are never
+        # mutated and no per-chunk update loop runs on the hot path.
+        texts = [chunk.page_content for chunk in chunks]
+        metas = [
+            {
+                **chunk.metadata,
+                "user_id": user_id,
+                "document_id": document_id,
+                "chunk_index": i,
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+        self.get_vectorstore(user_id).add_texts(texts, metadatas=metas)
 
         print(f"✅ Stored {len(chunks)} vectors in Pinecone (namespace: {namespace})")
         return len(chunks)
@@ -107,13 +131,7 @@ class PineconeService:
         document_id: Optional[int] = None,
         k: int = 4
     ) -> List[dict]:
-        namespace = f"user_{user_id}"
-
-        vector_store = PineconeVectorStore(
-            index_name=self.index_name,
-            embedding=self.embeddings,
-            namespace=namespace
-        )
+        vector_store = self.get_vectorstore(user_id)
 
         filter_dict = None
         if document_id:
@@ -127,9 +145,8 @@ class PineconeService:
 
     def delete_document_vectors(self, user_id: int, document_id: int):
         namespace = f"user_{user_id}"
-        index = self.pc.Index(self.index_name)
 
-        index.delete(
+        self._index.delete(
             filter={"document_id": {"$eq": document_id}},
             namespace=namespace
         )
@@ -138,18 +155,34 @@ class PineconeService:
 
     def get_chunk_count(self, user_id: int, document_id: int) -> int:
         namespace = f"user_{user_id}"
-        index = self.pc.Index(self.index_name)
 
-        stats = index.describe_index_stats()
+        stats = self._index.describe_index_stats()
 
         namespace_stats = stats.get('namespaces', {}).get(namespace, {})
         return namespace_stats.get('vector_count', 0)
 
     def get_vectorstore(self, user_id: int) -> PineconeVectorStore:
-        namespace = f"user_{user_id}"
+        store = self._vectorstores.get(user_id)
+        if store is None:
+            store = self._vectorstores[user_id] = PineconeVectorStore(
+                index=self._index,
+                embedding=self.embeddings,
+                namespace=f"user_{user_id}"
+            )
+        return store
 
-        return PineconeVectorStore(
-            index_name=self.index_name,
-            embedding=self.embeddings,
-            namespace=namespace
-        )
+
+# Lazy process-wide singleton. The comment in RAGService already warns
+# that per-request construction re-runs the index check and times out;
+# this makes the safe spelling the easy one for any new caller.
+_SERVICE: Optional[PineconeService] = None
+_LOCK = threading.Lock()
+
+
+def get_pinecone_service() -> PineconeService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _LOCK:
+            if _SERVICE is None:
+                _SERVICE = PineconeService()
+    return _SERVICE
@@ -1,14 +1,19 @@
 
+import asyncio
+import json
+import time
+
+import numpy as np
+from collections import OrderedDict
 from typing import List, Optional, AsyncGenerator
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import OpenAIEmbeddings
-from app.services.pinecone_service import PineconeService
+from app.services.pinecone_service import get_pinecone_service
 
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory       
 from langchain.prompts import PromptTemplate                 
-from langchain_core.messages import HumanMessage, AIMessage  
+from langchain_core.messages import HumanMessage
 from app.config import settings
+from app.utils.http_client import get_async_http_client, get_http_client
 
 
 
@@ -68,6 +73,151 @@ JSON:""",
     input_variables=["context", "num_cards", "topic", "difficulty"]
 )
 
+# Cards per concurrent LLM call and how many calls may be in flight at once
+FLASHCARD_BATCH_SIZE = 10
+FLASHCARD_CONCURRENCY = 4
+
+# Bounds for the per-process query caches
+QUERY_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL_SECONDS = 300
+
+# Semantic answer cache: paraphrases of an already-answered question
+# within this cosine similarity skip the whole retrieve+LLM pipeline.
+ANSWER_CACHE_SIZE = 256
+ANSWER_CACHE_TTL_SECONDS = 24 * 3600
+ANSWER_SIMILARITY_THRESHOLD = 0.97
+
+
+class _FlashcardStreamParser:
+    """
+    Incremental parser for the model's streamed JSON flashcard array.
+
+    Tokens arrive mid-string and mid-object, so feed() scans character
+    by character (tracking string/escape state and brace depth) and
+    emits each top-level object the moment its closing brace lands —
+    no third-party streaming-JSON dependency, no waiting for the full
+    array. Markdown fences and the array brackets are simply skipped.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[dict]:
+        cards = []
+        for ch in text:
+            if self._depth:
+                self._buf.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"' and self._depth:
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._buf = ["{"]
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        cards.append(json.loads("".join(self._buf)))
+                    except json.JSONDecodeError:
+                        pass  # malformed object — skip, keep streaming
+                    self._buf = []
+        return cards
+
+
+class _SemanticCache:
+    """
+    Answer cache keyed by query embedding, scoped per (user, document).
+
+    Lookup is a brute-force cosine scan over the stored vectors — at a
+    few hundred normalized 1536-dim entries that's one numpy matvec,
+    so a FAISS index would be pure dependency weight here. Entries
+    expire after a TTL and the oldest fall off past maxsize.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, threshold: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._threshold = threshold
+        # scope -> (list[np.ndarray], list[(timestamp, value)])
+        self._scopes: dict = {}
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> "np.ndarray":
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+    def get(self, scope, vector: List[float]):
+        entry = self._scopes.get(scope)
+        if not entry:
+            return None
+        vectors, values = entry
+        if not vectors:
+            # TTL eviction can leave a scope behind with empty lists;
+            # np.stack([]) raises, so treat it as the miss it is.
+            del self._scopes[scope]
+            return None
+        sims = np.stack(vectors) @ self._normalize(vector)
+        best = int(np.argmax(sims))
+        timestamp, value = values[best]
+        if sims[best] < self._threshold:
+            return None
+        if time.monotonic() - timestamp > self._ttl:
+            del vectors[best], values[best]
+            if not vectors:
+                del self._scopes[scope]
+            return None
+        return value
+
+    def put(self, scope, vector: List[float], value) -> None:
+        vectors, values = self._scopes.setdefault(scope, ([], []))
+        vectors.append(self._normalize(vector))
+        values.append((time.monotonic(), value))
+        while len(vectors) > self._maxsize:
+            del vectors[0], values[0]
+
+
+class _LRUCache:
+    """
+    Tiny bounded LRU with optional per-entry TTL.
+
+    Used for query embeddings (immutable, no TTL) and retrieval results
+    (short TTL so newly ingested documents show up quickly).
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: "OrderedDict" = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        timestamp, value = entry
+        if self._ttl is not None and time.monotonic() - timestamp > self._ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
 
 
 class RAGService:
@@ -89,22 +239,69 @@ class RAGService:
             max_tokens=4096
         )
 
-        import httpx
+        # Shared HTTP/2 clients with a warm keepalive pool — default
+        # per-service clients re-handshook TLS under concurrent load.
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-ada-002",
             openai_api_key=settings.OPENAI_API_KEY,
-            http_client=httpx.Client(),
-            http_async_client=httpx.AsyncClient()
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client()
         )
 
-        # Initialize once and reuse — creating PineconeService on every
+        # Process-wide singleton — creating PineconeService on every
         # request caused _ensure_index_exists() to run on each call,
         # making requests timeout and CORS headers never arrive.
-        self._pinecone = PineconeService()
+        self._pinecone = get_pinecone_service()
+
+        # Per-process caches: query embeddings are immutable, retrieval
+        # results get a short TTL so fresh uploads surface quickly.
+        self._query_vector_cache = _LRUCache(QUERY_CACHE_SIZE)
+        self._search_cache = _LRUCache(QUERY_CACHE_SIZE, ttl=SEARCH_CACHE_TTL_SECONDS)
+        self._answer_cache = _SemanticCache(
+            ANSWER_CACHE_SIZE,
+            ttl=ANSWER_CACHE_TTL_SECONDS,
+            threshold=ANSWER_SIMILARITY_THRESHOLD,
+        )
 
     def get_vectorstore(self, user_id: int):
         return self._pinecone.get_vectorstore(user_id)
 
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed many texts with a single batched API call.
+
+        The embeddings endpoint accepts a list natively, so N texts cost one
+        HTTP round trip instead of N. Identical strings are deduplicated
+        before the request and results are mapped back by position.
+        """
+        if not texts:
+            return []
+
+        unique_texts = list(dict.fromkeys(texts))
+        vectors = self.embeddings.embed_documents(unique_texts)
+        vector_by_text = dict(zip(unique_texts, vectors))
+
+        return [vector_by_text[text] for text in texts]
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Async counterpart of embed_texts for use from async handlers."""
+        if not texts:
+            return []
+
+        unique_texts = list(dict.fromkeys(texts))
+        vectors = await self.embeddings.aembed_documents(unique_texts)
+        vector_by_text = dict(zip(unique_texts, vectors))
+
+        return [vector_by_text[text] for text in texts]
+
+    def embed_query_cached(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached vector on repeat questions."""
+        vector = self._query_vector_cache.get(query)
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+            self._query_vector_cache.put(query, vector)
+        return vector
+
     def get_retriever(
         self,
         user_id: int,
@@ -127,6 +324,97 @@ class RAGService:
 
         return retriever
 
+    def _retrieve_by_vector(
+        self,
+        user_id: int,
+        document_id: Optional[int],
+        vector: List[float],
+        k: int = 5
+    ):
+        """
+        Retrieve with an already-computed query embedding.
+
+        The high-level retriever re-embeds the question string; every
+        answer path here has the vector in hand already (cache probe),
+        so going through similarity_search_by_vector saves an OpenAI
+        round trip per question.
+        """
+        vectorstore = self.get_vectorstore(user_id)
+        search_filter = {"document_id": document_id} if document_id else None
+        return vectorstore.similarity_search_by_vector(
+            vector, k=k, filter=search_filter
+        )
+
+    @staticmethod
+    def _apply_query_mode(question: str, query_mode: str) -> str:
+        """Rewrite the question according to the requested query mode."""
+        if query_mode == "eli5":
+            return f"Explain this like I'm 5 years old: {question}"
+        if query_mode == "practice":
+            return f"Give me 5 practice problems about: {question}"
+        if query_mode == "summary":
+            return f"Give me a concise summary of: {question}"
+        return question
+
+    @staticmethod
+    def _sources_from_docs(docs) -> List[dict]:
+        """Build the API source payload from retrieved LangChain documents."""
+        return [
+            {
+                "content": doc.page_content[:200] + "...",
+                "page": doc.metadata.get("page", "unknown"),
+                "document_id": doc.metadata.get("document_id")
+            }
+            for doc in docs
+        ]
+
+    @staticmethod
+    def _format_chat_history(chat_history: Optional[List[dict]]) -> str:
+        """Render chat history as plain text for the QA prompt."""
+        if not chat_history:
+            return ""
+        return "\n".join(
+            f"{msg['role']}: {msg['content']}" for msg in chat_history
+        )
+
+    async def astream_question(
+        self,
+        question: str,
+        user_id: int,
+        document_id: Optional[int] = None,
+        chat_history: Optional[List[dict]] = None,
+        query_mode: str = "normal"
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Stream an answer token-by-token.
+
+        Yields {"type": "chunk", "text": ...} events as the model generates,
+        followed by a final {"type": "done", "sources": [...], "query_mode": ...}.
+        Time-to-first-token is one model token instead of the full answer.
+        """
+        question = self._apply_query_mode(question, query_mode)
+
+        vector = await asyncio.to_thread(self.embed_query_cached, question)
+        docs = await asyncio.to_thread(
+            self._retrieve_by_vector, user_id, document_id, vector
+        )
+
+        prompt = STUDY_QA_PROMPT.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            chat_history=self._format_chat_history(chat_history),
+            question=question
+        )
+
+        async for chunk in self.llm.astream([HumanMessage(content=prompt)]):
+            if chunk.content:
+                yield {"type": "chunk", "text": chunk.content}
+
+        yield {
+            "type": "done",
+            "sources": self._sources_from_docs(docs),
+            "query_mode": query_mode
+        }
+
     def ask_question(
         self,
         question: str,
@@ -153,59 +441,81 @@ class RAGService:
         the most relevant chunks using semantic similarity, not
         just keyword matching!
         """
-        # Modify question based on query mode
-        if query_mode == "eli5":
-            question = f"Explain this like I'm 5 years old: {question}"
-        elif query_mode == "practice":
-            question = f"Give me 5 practice problems about: {question}"
-        elif query_mode == "summary":
-            question = f"Give me a concise summary of: {question}"
-
-        # Get retriever
-        retriever = self.get_retriever(user_id, document_id)
-
-       
-        lc_chat_history = []
-        if chat_history:
-            for msg in chat_history:
-                if msg["role"] == "user":
-                    lc_chat_history.append(
-                        HumanMessage(content=msg["content"])
-                    )
-                elif msg["role"] == "assistant":
-                    lc_chat_history.append(
-                        AIMessage(content=msg["content"])
-                    )
-
-        chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=retriever,
-            return_source_documents=True,
-            combine_docs_chain_kwargs={
-                "prompt": STUDY_QA_PROMPT
-            }
-        )
+        question = self._apply_query_mode(question, query_mode)
 
-        # Execute chain
-        result = chain.invoke({
-            "question": question,
-            "chat_history": lc_chat_history
-        })
+        # One embed serves both the semantic cache probe and retrieval.
+        vector = self.embed_query_cached(question)
+        cache_scope = (user_id, document_id, query_mode)
+        cached = self._answer_cache.get(cache_scope, vector)
+        if cached is not None:
+            return cached
 
-      
-        sources = []
-        for doc in result.get("source_documents", []):
-            sources.append({
-                "content": doc.page_content[:200] + "...",
-                "page": doc.metadata.get("page", "unknown"),
-                "document_id": doc.metadata.get("document_id")
-            })
+        docs = self._retrieve_by_vector(user_id, document_id, vector)
+
+        response = self.llm.invoke([
+            HumanMessage(content=self._build_qa_prompt(question, docs, chat_history))
+        ])
+
+        result = {
+            "answer": response.content,
+            "sources": self._sources_from_docs(docs),
+            "query_mode": query_mode
+        }
+        self._answer_cache.put(cache_scope, vector, result)
+        return result
+
+    async def aask_question(
+        self,
+        question: str,
+        user_id: int,
+        document_id: Optional[int] = None,
+        chat_history: Optional[List[dict]] = None,
+        query_mode: str = "normal"
+    ) -> dict:
+        """
+        Async variant of ask_question.
+
+        Retrieval runs off the loop and the LLM goes through ainvoke so
+        neither round trip blocks the event loop — use this from async
+        handlers and the WebSocket instead of calling ask_question
+        directly.
+        """
+        question = self._apply_query_mode(question, query_mode)
+
+        vector = await asyncio.to_thread(self.embed_query_cached, question)
+        cache_scope = (user_id, document_id, query_mode)
+        cached = self._answer_cache.get(cache_scope, vector)
+        if cached is not None:
+            return cached
+
+        docs = await asyncio.to_thread(
+            self._retrieve_by_vector, user_id, document_id, vector
+        )
 
-        return {
-            "answer": result["answer"],
-            "sources": sources,
+        response = await self.llm.ainvoke([
+            HumanMessage(content=self._build_qa_prompt(question, docs, chat_history))
+        ])
+
+        result = {
+            "answer": response.content,
+            "sources": self._sources_from_docs(docs),
             "query_mode": query_mode
         }
+        self._answer_cache.put(cache_scope, vector, result)
+        return result
+
+    def _build_qa_prompt(
+        self,
+        question: str,
+        docs,
+        chat_history: Optional[List[dict]]
+    ) -> str:
+        """Fill STUDY_QA_PROMPT from retrieved docs and raw history."""
+        return STUDY_QA_PROMPT.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            chat_history=self._format_chat_history(chat_history),
+            question=question
+        )
 
     def generate_flashcards(
         self,
@@ -215,8 +525,7 @@ class RAGService:
         num_cards: int = 10,
         difficulty: str = "medium"
     ) -> List[dict]:
-   
-        import json
+
         retriever = self.get_retriever(
             user_id,
             document_id,
@@ -252,10 +561,126 @@ class RAGService:
             HumanMessage(content=prompt)
         ])
 
-        # Parse JSON response
+        return self._parse_flashcards(response.content, difficulty)
+
+    async def agenerate_flashcards(
+        self,
+        user_id: int,
+        document_id: int,
+        topic: Optional[str] = None,
+        num_cards: int = 10,
+        difficulty: str = "medium"
+    ) -> List[dict]:
+        """
+        Async flashcard generation that fans out over concurrent LLM calls.
+
+        Large requests are split into batches of FLASHCARD_BATCH_SIZE cards
+        generated concurrently via asyncio.gather, bounded by a semaphore so
+        we stay inside the provider's rate limits. Wall-clock latency for 30
+        cards drops to roughly that of a single batch.
+        """
+        retriever = self.get_retriever(user_id, document_id, k=5)
+
+        search_query = topic if topic else "main concepts and key information"
+        relevant_docs = await asyncio.to_thread(retriever.invoke, search_query)
+
+        context = "\n\n---\n\n".join([
+            doc.page_content for doc in relevant_docs
+        ])
+
+        if not context:
+            raise ValueError(
+                "No content found in document. "
+                "Make sure the PDF was processed successfully."
+            )
+
+        # Split the request into concurrent batches of at most
+        # FLASHCARD_BATCH_SIZE cards each.
+        batch_sizes = []
+        remaining = num_cards
+        while remaining > 0:
+            batch_sizes.append(min(FLASHCARD_BATCH_SIZE, remaining))
+            remaining -= FLASHCARD_BATCH_SIZE
+
+        semaphore = asyncio.Semaphore(FLASHCARD_CONCURRENCY)
+
+        async def generate_batch(batch_size: int) -> List[dict]:
+            prompt = FLASHCARD_PROMPT.format(
+                context=context,
+                num_cards=batch_size,
+                topic=topic or "all key concepts",
+                difficulty=difficulty
+            )
+            async with semaphore:
+                response = await self.flashcard_llm.ainvoke([
+                    HumanMessage(content=prompt)
+                ])
+            return self._parse_flashcards(response.content, difficulty)
+
+        batches = await asyncio.gather(
+            *(generate_batch(size) for size in batch_sizes)
+        )
+
+        flashcards = [card for batch in batches for card in batch]
+        return flashcards[:num_cards]
+
+    async def astream_flashcards(
+        self,
+        user_id: int,
+        document_id: int,
+        topic: Optional[str] = None,
+        num_cards: int = 10,
+        difficulty: str = "medium"
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Stream flashcards as the model writes them.
+
+        generate_flashcards waits for the whole completion before
+        parsing, so the user stares at a spinner for the full
+        generation. Here tokens feed an incremental JSON parser and
+        each card is yielded the moment its object closes — time to
+        first card is one model chunk, not the whole response.
+        """
+        retriever = self.get_retriever(user_id, document_id, k=5)
+
+        search_query = topic if topic else "main concepts and key information"
+        relevant_docs = await asyncio.to_thread(retriever.invoke, search_query)
+
+        context = "\n\n---\n\n".join([
+            doc.page_content for doc in relevant_docs
+        ])
+
+        if not context:
+            raise ValueError(
+                "No content found in document. "
+                "Make sure the PDF was processed successfully."
+            )
+
+        prompt = FLASHCARD_PROMPT.format(
+            context=context,
+            num_cards=num_cards,
+            topic=topic or "all key concepts",
+            difficulty=difficulty
+        )
+
+        parser = _FlashcardStreamParser()
+        yielded = 0
+        async for chunk in self.flashcard_llm.astream([HumanMessage(content=prompt)]):
+            for card in parser.feed(chunk.content):
+                if "question" in card and "answer" in card:
+                    yield {
+                        "question": card["question"],
+                        "answer": card["answer"],
+                        "difficulty": card.get("difficulty", difficulty),
+                    }
+                    yielded += 1
+                    if yielded >= num_cards:
+                        return
+
+    def _parse_flashcards(self, response_text: str, difficulty: str) -> List[dict]:
+        """Parse and validate the model's JSON flashcard payload."""
         try:
             # Clean response (remove markdown code blocks if present)
-            response_text = response.content
             if "```json" in response_text:
                 response_text = response_text.split("```json")[1].split("```")[0]
             elif "```" in response_text:
@@ -285,12 +710,17 @@ class RAGService:
         document_id: Optional[int] = None,
         k: int = 5
     ) -> List[dict]:
-    
+
+        cache_key = (user_id, document_id, k, query)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         retriever = self.get_retriever(user_id, document_id, k=k)
 
         results = retriever.invoke(query)
 
-        return [
+        payload = [
             {
                 "content": doc.page_content,
                 "page": doc.metadata.get("page", "unknown"),
@@ -298,4 +728,44 @@ class RAGService:
                 "relevance_score": doc.metadata.get("score", None)
             }
             for doc in results
-        ]             
\ No newline at end of file
+        ]
+
+        self._search_cache.put(cache_key, payload)
+        return payload
+
+    async def abatch_search(
+        self,
+        queries: List[str],
+        user_id: int,
+        document_id: Optional[int] = None,
+        k: int = 5
+    ) -> List[List[dict]]:
+        """
+        Run several searches at once: one batched embedding call for all
+        queries, then the ANN lookups fired concurrently. Total latency is
+        bounded by the slowest single lookup instead of the sum.
+
+        Returns one result list per query, in input order.
+        """
+        vectors = await self.aembed_texts(queries)
+
+        vectorstore = self.get_vectorstore(user_id)
+        search_filter = {"document_id": document_id} if document_id else None
+
+        async def search_one(vector: List[float]) -> List[dict]:
+            scored = await asyncio.to_thread(
+                lambda: vectorstore.similarity_search_by_vector_with_score(
+                    vector, k=k, filter=search_filter
+                )
+            )
+            return [
+                {
+                    "content": doc.page_content,
+                    "page": doc.metadata.get("page", "unknown"),
+                    "document_id": doc.metadata.get("document_id"),
+                    "relevance_score": score
+                }
+                for doc, score in scored
+            ]
+
+        return list(await asyncio.gather(*(search_one(v) for v in vectors)))             
\ No newline at end of file
@@ -7,8 +7,12 @@ Quality ratings (matches Anki's scale):
   "good"  -> 4  Correct with some hesitation
   "easy"  -> 5  Correct with no hesitation
 """
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
 
 QUALITY_MAP = {
     "again": 0,
@@ -19,13 +23,59 @@ QUALITY_MAP = {
 
 MIN_EASINESS = 1.3
 
+# Numba compiles _sm2_core to native code when available (cache=True
+# persists the artifact so worker restarts don't recompile). It's an
+# optional speedup — the pure-Python core is correct on its own and
+# the deployment doesn't have to carry the LLVM toolchain.
+try:  # pragma: no cover - optional dependency
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+
+
+def _sm2_core(
+    q: int,
+    repetitions: int,
+    easiness_factor: float,
+    interval: int,
+) -> tuple:
+    """
+    Pure-arithmetic SM-2 step: (new_reps, new_ef, new_interval, correct).
+
+    No datetimes, no dicts, no dataclasses — just ints and floats, so
+    it stays nopython-compilable. Callers map quality strings to codes
+    and wrap the result.
+    """
+    if q < 3:
+        # Incorrect — reset streak, review again soon.
+        # EF unchanged on failure in classic SM-2.
+        return 0, easiness_factor, 1, False
+
+    new_repetitions = repetitions + 1
+    if new_repetitions == 1:
+        new_interval = 1
+    elif new_repetitions == 2:
+        new_interval = 6
+    else:
+        new_interval = int(round(interval * easiness_factor))
+
+    new_ef = easiness_factor + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if new_ef < MIN_EASINESS:
+        new_ef = MIN_EASINESS
+    return new_repetitions, new_ef, new_interval, True
+
+
+if _njit is not None:  # pragma: no cover - optional dependency
+    _sm2_core = _njit(cache=True)(_sm2_core)
+
 
 @dataclass
 class SM2Result:
     repetitions: int
     easiness_factor: float
     interval: int          # days until next review
-    next_review_date: datetime
+    # datetime normally; an epoch-day int when return_epoch_days is set
+    next_review_date: Union[datetime, int]
     is_correct: bool
 
 
@@ -34,31 +84,28 @@ def calculate_sm2(
     repetitions: int,
     easiness_factor: float,
     interval: int,
+    return_epoch_days: bool = False,
 ) -> SM2Result:
+    """
+    Score one review.
+
+    return_epoch_days swaps the datetime in next_review_date for an
+    integer day-since-epoch — bulk rescheduling jobs that only compare
+    dates skip a datetime allocation per card and convert at the API
+    boundary instead.
+    """
     
-    q = QUALITY_MAP[quality]
-    is_correct = q >= 3
+    new_repetitions, new_ef, new_interval, is_correct = _sm2_core(
+        QUALITY_MAP[quality], repetitions, easiness_factor, interval
+    )
 
-    if not is_correct:
-        # Incorrect — reset streak, review again soon
-        new_repetitions = 0
-        new_interval = 1
-        new_ef = easiness_factor  # EF unchanged on failure in classic SM-2
+    if return_epoch_days:
+        next_review = int(time.time() // 86400) + new_interval
     else:
-        new_repetitions = repetitions + 1
-
-        if new_repetitions == 1:
-            new_interval = 1
-        elif new_repetitions == 2:
-            new_interval = 6
-        else:
-            new_interval = round(interval * easiness_factor)
-
-        # Update easiness factor
-        new_ef = easiness_factor + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
-        new_ef = max(MIN_EASINESS, new_ef)
-
-    next_review = datetime.utcnow() + timedelta(days=new_interval)
+        next_review = (
+            datetime.now(timezone.utc).replace(tzinfo=None)
+            + timedelta(days=new_interval)
+        )
 
     return SM2Result(
         repetitions=new_repetitions,
@@ -67,3 +114,60 @@ def calculate_sm2(
         next_review_date=next_review,
         is_correct=is_correct,
     )
+
+
+def calculate_sm2_batch(
+    qualities: Sequence[str],
+    repetitions: Sequence[int],
+    easiness_factors: Sequence[float],
+    intervals: Sequence[int],
+    now: datetime = None,
+    return_epoch_days: bool = False,
+) -> Dict[str, List]:
+    """
+    Vectorized SM-2 over whole review batches.
+
+    Same math as calculate_sm2, applied element-wise with NumPy so a
+    batch of N cards costs a handful of array ops instead of N Python
+    calls. Returns plain Python lists (one entry per input card) ready
+    for bulk_update_mappings. With return_epoch_days the
+    next_review_date list holds day-since-epoch ints instead of
+    datetimes (see calculate_sm2).
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    q = np.array([QUALITY_MAP[quality] for quality in qualities], dtype=np.int64)
+    reps = np.asarray(repetitions, dtype=np.int64)
+    efs = np.asarray(easiness_factors, dtype=np.float64)
+    ivls = np.asarray(intervals, dtype=np.int64)
+
+    is_correct = q >= 3
+    new_reps = np.where(is_correct, reps + 1, 0)
+
+    # Branchless interval: failure -> 1, first rep -> 1, second -> 6,
+    # later reps -> round(interval * EF).
+    new_intervals = np.where(
+        new_reps <= 1,
+        1,
+        np.where(new_reps == 2, 6, np.rint(ivls * efs).astype(np.int64)),
+    )
+
+    # EF update only applies to correct answers (classic SM-2).
+    ef_delta = 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)
+    new_efs = np.where(is_correct, np.maximum(MIN_EASINESS, efs + ef_delta), efs)
+    new_efs = np.round(new_efs, 4)
+
+    if return_epoch_days:
+        today = int(now.timestamp() // 86400)
+        next_reviews = (today + new_intervals).tolist()
+    else:
+        next_reviews = [now + timedelta(days=int(days)) for days in new_intervals]
+
+    return {
+        "repetitions": new_reps.tolist(),
+        "easiness_factor": new_efs.tolist(),
+        "interval": new_intervals.tolist(),
+        "next_review_date": next_reviews,
+        "is_correct": is_correct.tolist(),
+    }
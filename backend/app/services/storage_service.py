@@ -7,10 +7,11 @@ temporary local file when PDF processing is needed.
 """
 import os
 import tempfile
-from datetime import datetime
+import time
 from functools import lru_cache
 from typing import Optional
 
+import httpx
 from supabase import create_client, Client
 from app.config import settings
 
@@ -38,6 +39,21 @@ class StorageService:
         )
         return storage_path
 
+    def upload_stream(self, file_obj, storage_path: str) -> str:
+        """
+        Upload from a file-like object without materializing the bytes.
+
+        httpx streams the body straight off the file object, so peak
+        memory stays at the read-buffer size rather than O(file).
+        """
+        file_obj.seek(0)
+        self._client.storage.from_(self.bucket).upload(
+            path=storage_path,
+            file=file_obj,
+            file_options={"content-type": "application/pdf"},
+        )
+        return storage_path
+
     def download(self, storage_path: str) -> bytes:
         """Download file bytes from Supabase Storage."""
         return self._client.storage.from_(self.bucket).download(storage_path)
@@ -49,6 +65,25 @@ class StorageService:
         except Exception as e:
             print(f"[StorageService] Failed to delete {storage_path}: {e}")
 
+    def delete_many(self, storage_paths: list) -> None:
+        """
+        Delete several files in one API call.
+
+        remove() accepts a list natively, so N paths cost one HTTP
+        round trip instead of N. If a batch fails, each path is retried
+        individually so one bad entry can't strand the rest.
+        """
+        if not storage_paths:
+            return
+        for start in range(0, len(storage_paths), 1000):
+            batch = storage_paths[start:start + 1000]
+            try:
+                self._client.storage.from_(self.bucket).remove(batch)
+            except Exception as e:
+                print(f"[StorageService] Batch delete failed ({e}); retrying per path")
+                for path in batch:
+                    self.delete(path)
+
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
@@ -58,13 +93,31 @@ class StorageService:
         Download a file to a local temp file. Caller is responsible for
         deleting the temp file when done (use try/finally + os.unlink).
 
+        Streams over a short-lived signed URL in 64 KiB chunks, so the
+        file goes socket -> temp file without ever existing as one big
+        bytes object in the Python heap. Falls back to the client's
+        buffered download if signing fails.
+
         Returns the temp file path.
         """
-        file_bytes = self.download(storage_path)
         suffix = os.path.splitext(storage_path)[-1] or ".pdf"
         tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
         try:
-            tmp.write(file_bytes)
+            signed = self._client.storage.from_(self.bucket).create_signed_url(
+                storage_path, 60
+            )
+            with httpx.stream("GET", signed["signedURL"], timeout=30.0) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(65536):
+                    tmp.write(chunk)
+            tmp.flush()
+            return tmp.name
+        except Exception:
+            # Signed-URL path unavailable (private bucket policy, old
+            # storage API) — fall back to the buffered client download.
+            tmp.seek(0)
+            tmp.truncate()
+            tmp.write(self.download(storage_path))
             tmp.flush()
             return tmp.name
         finally:
@@ -73,7 +126,13 @@ class StorageService:
     @staticmethod
     def build_storage_path(user_id: int, filename: str) -> str:
         """Build a deterministic, unique storage path for a file."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # time.gmtime + f-string: no datetime allocation, no locale
+        # machinery in strftime, and UTC to match the rest of the app.
+        t = time.gmtime()
+        timestamp = (
+            f"{t.tm_year}{t.tm_mon:02d}{t.tm_mday:02d}"
+            f"_{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}"
+        )
         # Sanitize filename to avoid path traversal
         safe_name = os.path.basename(filename)
         return f"{user_id}/{timestamp}_{safe_name}"
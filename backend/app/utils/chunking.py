@@ -1,7 +1,59 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Optional, Tuple
+
+import tiktoken
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document as LangchainDocument
 
+# Rust-backed splitter, used for very large texts where LangChain's
+# pure-Python recursive scan becomes the bottleneck. Optional: the
+# LangChain path handles everything if the wheel isn't installed.
+try:
+    from semantic_text_splitter import TextSplitter as _RustTextSplitter
+except ImportError:  # pragma: no cover - optional dependency
+    _RustTextSplitter = None
+
+# Above this size the native splitter's throughput win dwarfs its
+# slightly different boundary choices; below it, LangChain is fine.
+FAST_SPLIT_THRESHOLD = 50_000
+
+# One separator ladder for every splitter in the app — paragraph, line,
+# sentence, word, character. These are literal strings (str.find inside
+# the splitter, no regex), so keeping them identical everywhere matters
+# more for cache-friendly chunk reuse than any scanning trick.
+# Memoized splitter output, shared by every chunker instance. Keyed by
+# (content digest, chunk_size, overlap) so differently-configured
+# chunkers never collide; bounded LRU. Reprocessing and re-embedding
+# flows feed the same pages back through, and the recursive separator
+# scan is pure CPU for an identical answer.
+_CHUNK_CACHE: "OrderedDict" = OrderedDict()
+_CHUNK_CACHE_MAX = 512
+
+# Splitter instances shared across chunkers with the same settings —
+# construction compiles separator handling and materializes config,
+# and the split methods themselves are stateless, so per-request
+# TextChunker instances can all point at one splitter.
+_SPLITTER_CACHE: dict = {}
+_SPLITTER_LOCK = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _get_encoder() -> "tiktoken.Encoding":
+    """BPE encoder, loaded once — get_encoding builds the merge table."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+DEFAULT_SEPARATORS = [
+    "\n\n",   # 1st: paragraphs
+    "\n",     # 2nd: lines
+    ". ",     # 3rd: sentences
+    " ",      # 4th: words
+    "",       # last resort: characters
+]
+
 
 class TextChunker:
     """
@@ -18,19 +70,22 @@ class TextChunker:
         self.chunk_overlap = chunk_overlap
         self.min_chunk_size = min_chunk_size
 
-        # LangChain splitter - tries these s eparators in order
-        self._splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=[
-                "\n\n",   # 1st: paragraphs
-                "\n",     # 2nd: lines
-                ". ",     # 3rd: sentences
-                " ",      # 4th: words
-                "",       # last resort: characters
-            ]
-        )
+        key = (chunk_size, chunk_overlap)
+        with _SPLITTER_LOCK:
+            if key not in _SPLITTER_CACHE:
+                # LangChain splitter - tries the separators in order
+                _SPLITTER_CACHE[key] = (
+                    RecursiveCharacterTextSplitter(
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                        length_function=len,
+                        separators=DEFAULT_SEPARATORS,
+                    ),
+                    _RustTextSplitter(chunk_size, overlap=chunk_overlap)
+                    if _RustTextSplitter is not None
+                    else None,
+                )
+            self._splitter, self._fast_splitter = _SPLITTER_CACHE[key]
 
     def chunk_text(self, text: str) -> List[str]:
         """Split text into overlapping chunks."""
@@ -38,7 +93,30 @@ class TextChunker:
             return []
         if len(text) < self.min_chunk_size:
             return [text]
-        return self._splitter.split_text(text)
+
+        # Only texts big enough that splitting costs more than hashing
+        # are worth a cache slot.
+        if len(text) <= 8 * self.chunk_size:
+            return self._splitter.split_text(text)
+
+        if self._fast_splitter is not None and len(text) > FAST_SPLIT_THRESHOLD:
+            return self._fast_splitter.chunks(text)
+
+        key = (
+            hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(),
+            self.chunk_size,
+            self.chunk_overlap,
+        )
+        cached = _CHUNK_CACHE.get(key)
+        if cached is not None:
+            _CHUNK_CACHE.move_to_end(key)
+            return cached
+
+        chunks = self._splitter.split_text(text)
+        _CHUNK_CACHE[key] = chunks
+        while len(_CHUNK_CACHE) > _CHUNK_CACHE_MAX:
+            _CHUNK_CACHE.popitem(last=False)
+        return chunks
 
     def chunk_documents(
         self,
@@ -51,6 +129,85 @@ class TextChunker:
         """Rough token estimate (1 token ≈ 4 chars)."""
         return len(text) // 4
 
+    def chunk_text_token_bounded(self, text: str, max_tokens: int) -> List[str]:
+        """
+        Split text so no chunk exceeds max_tokens.
+
+        The splitter itself keeps measuring with len — handing it a
+        tokenizer as length_function gets called once per candidate
+        split inside the recursion and is ruinously slow. Instead:
+        split by characters as usual, token-count every chunk in one
+        batched call, and re-split only the chunks that came out over
+        the limit with a proportionally smaller character size.
+        """
+        chunks = self.chunk_text(text)
+        if not chunks:
+            return chunks
+
+        counts = self.count_tokens_batch(chunks)
+        bounded: List[str] = []
+        for chunk, tokens in zip(chunks, counts):
+            if tokens <= max_tokens:
+                bounded.append(chunk)
+            else:
+                bounded.extend(self._resplit_token_bounded(chunk, tokens, max_tokens))
+        return bounded
+
+    def _resplit_token_bounded(
+        self,
+        chunk: str,
+        tokens: int,
+        max_tokens: int,
+    ) -> List[str]:
+        """
+        Re-split one oversized chunk until every piece fits max_tokens.
+
+        Chars-per-token is roughly constant within a chunk, so scaling
+        the character size by max_tokens/tokens usually lands under the
+        limit in a single pass; the loop only spins again for unusually
+        token-dense text, shrinking further each round.
+        """
+        size = len(chunk)
+        pieces = [chunk]
+        counts = [tokens]
+        while max(counts) > max_tokens and size > self.min_chunk_size:
+            size = max(
+                self.min_chunk_size,
+                int(size * max_tokens / max(counts)),
+            )
+            splitter = TextChunker(
+                chunk_size=size,
+                chunk_overlap=min(self.chunk_overlap, size // 5),
+                min_chunk_size=self.min_chunk_size,
+            )
+            pieces = [
+                part
+                for piece, count in zip(pieces, counts)
+                for part in ([piece] if count <= max_tokens else splitter.chunk_text(piece))
+            ]
+            counts = self.count_tokens_batch(pieces)
+        return pieces
+
+    def count_tokens(self, text: str) -> int:
+        """Exact token count for a single text (use the batch form in loops)."""
+        return self.count_tokens_batch([text])[0]
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Exact token counts for a whole document's chunks in one call.
+
+        encode_ordinary_batch runs tiktoken's Rust BPE across threads
+        with the GIL released — counting per chunk in a Python loop is
+        orders of magnitude slower for the same answer. Call this once
+        with every chunk, not inside the chunking loop.
+        """
+        if not texts:
+            return []
+        encoded = _get_encoder().encode_ordinary_batch(
+            texts, num_threads=min(8, os.cpu_count() or 1)
+        )
+        return [len(tokens) for tokens in encoded]
+
 
 class PageAwareChunker(TextChunker):
     """
@@ -77,19 +234,21 @@ class PageAwareChunker(TextChunker):
             Input:  [(1, "Page 1 text..."), (2, "Page 2 text...")]
             Output: [("chunk 1", 1), ("chunk 2", 1), ("chunk 3", 2)]
         """
-        chunks_with_pages = []
-
-        for page_num, page_text in page_texts:
-            if not page_text or not page_text.strip():
-                continue  # Skip empty pages
-
-            chunks = self.chunk_text(page_text)
-
-            for chunk in chunks:
-                if chunk.strip():  # Skip empty chunks
-                    chunks_with_pages.append((chunk, page_num))
+        # One splitter invocation for the whole document instead of one
+        # per page — create_documents carries the page number through
+        # as metadata, and LangChain's internal merge loop does the
+        # batching that the old per-page Python loop paid for N times.
+        texts = [text for _, text in page_texts if text and text.strip()]
+        metadatas = [{"page": page} for page, text in page_texts if text and text.strip()]
+        if not texts:
+            return []
 
-        return chunks_with_pages
+        docs = self._splitter.create_documents(texts, metadatas=metadatas)
+        return [
+            (doc.page_content, doc.metadata["page"])
+            for doc in docs
+            if doc.page_content.strip()
+        ]
 
     def chunk_langchain_docs(
         self,
@@ -104,3 +263,13 @@ class PageAwareChunker(TextChunker):
 
 
 
+
+
+@lru_cache(maxsize=None)
+def get_chunker(
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    min_chunk_size: int = 100,
+) -> TextChunker:
+    """Shared TextChunker per configuration — chunkers are stateless."""
+    return TextChunker(chunk_size, chunk_overlap, min_chunk_size)
@@ -0,0 +1,32 @@
+"""
+Shared HTTP clients for outbound API traffic (OpenAI, Anthropic).
+
+httpx's defaults keep a small pool and speak HTTP/1.1, so short
+embedding/completion requests under load pay a fresh TCP+TLS handshake
+(~50-100 ms) more often than they should. These singletons hold a large
+keepalive pool and negotiate HTTP/2, so concurrent requests multiplex
+over a handful of warm connections instead.
+
+Senior Tip: one client per process, not per service — the pool is the
+whole point.
+"""
+from functools import lru_cache
+
+import httpx
+
+_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=50,
+    keepalive_expiry=60,
+)
+_TIMEOUT = httpx.Timeout(30.0)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    return httpx.Client(http2=True, limits=_LIMITS, timeout=_TIMEOUT)
+
+
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(http2=True, limits=_LIMITS, timeout=_TIMEOUT)
@@ -1,18 +1,57 @@
-from datetime import datetime, timedelta
+import functools
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 from app.config import settings
 
+# Bound for the decoded-token cache; at ~300 bytes per entry this caps
+# the cache around 3 MB even under heavy multi-user traffic.
+TOKEN_CACHE_MAX = 10_000
+
 
 class SecurityManager:
 
 
     def __init__(self):
-        self._pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        # Pre-computed to maintain constant-time response on login failures,
-        # preventing timing-based user enumeration attacks.
-        self._dummy_hash = self._pwd_context.hash("dummy-timing-placeholder")
+        # CryptContext construction (and passlib's backend loading
+        # behind it) is deferred to first use: the singleton below is
+        # built at import in every worker, and workers serving only
+        # token-authenticated traffic never hash a password at all.
+        self.__pwd_context: Optional[CryptContext] = None
+        self.__pwd_context_lock = threading.Lock()
+        # token string -> (payload, exp). Entries self-invalidate at
+        # their own exp, so no separate TTL bookkeeping is needed.
+        self._token_cache: "OrderedDict" = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+
+    @property
+    def _pwd_context(self) -> CryptContext:
+        if self.__pwd_context is None:
+            with self.__pwd_context_lock:
+                if self.__pwd_context is None:
+                    # argon2id for new hashes (OWASP parameters); bcrypt
+                    # stays registered so existing hashes keep verifying,
+                    # and marking it deprecated makes passlib flag them
+                    # for rehash on successful login.
+                    self.__pwd_context = CryptContext(
+                        schemes=["argon2", "bcrypt"],
+                        deprecated=["bcrypt"],
+                        argon2__memory_cost=19456,
+                        argon2__time_cost=2,
+                        argon2__parallelism=1,
+                    )
+        return self.__pwd_context
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True for legacy (bcrypt) hashes that should be upgraded."""
+        return self._pwd_context.needs_update(hashed_password)
 
     def hash_password(self, password: str) -> str:
         return self._pwd_context.hash(password)
@@ -20,9 +59,34 @@ class SecurityManager:
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         return self._pwd_context.verify(plain_password, hashed_password)
 
+    @functools.cache
     def get_dummy_hash(self) -> str:
-        """Return pre-computed dummy hash for constant-time login responses."""
-        return self._dummy_hash
+        """
+        Dummy hash for constant-time login failures (anti user-enumeration).
+
+        Computed on first use and memoized — bcrypt costs ~100 ms, and
+        paying it at import slowed every worker start. verify_password is
+        still called unconditionally, so timing stays constant.
+        """
+        return self._pwd_context.hash("dummy-timing-placeholder")
+
+    def hash_session_token(self, token: str) -> str:
+        """
+        Hash a high-entropy opaque token (refresh/session tokens).
+
+        Keyed blake2b, not the password context: random >=128-bit
+        tokens can't be dictionary-attacked, so a slow KDF buys nothing
+        and costs ~100 ms per check. NEVER use this for user passwords.
+        """
+        return hashlib.blake2b(
+            token.encode("utf-8"),
+            digest_size=32,
+            key=settings.SECRET_KEY.encode("utf-8")[:64],
+        ).hexdigest()
+
+    def verify_session_token(self, token: str, stored_digest: str) -> bool:
+        """Constant-time comparison against a stored token digest."""
+        return hmac.compare_digest(self.hash_session_token(token), stored_digest)
 
     def create_access_token(
         self,
@@ -30,20 +94,48 @@ class SecurityManager:
         expires_delta: Optional[timedelta] = None
     ) -> str:
         to_encode = data.copy()
-        expire = (
-            datetime.now() + expires_delta
-            if expires_delta
-            else datetime.now() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
-        to_encode.update({"exp": expire})
+        ttl = expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        # exp as an epoch int: that's the wire format anyway, so PyJWT
+        # skips the datetime conversion — and time.time() is UTC by
+        # definition where datetime.now() drifted with the server's
+        # local timezone.
+        to_encode["exp"] = int(time.time()) + int(ttl.total_seconds())
         return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     def decode_access_token(self, token: str) -> Optional[dict]:
+        """
+        Decode (and cache) a bearer token.
+
+        The same token arrives on every request a user makes, and each
+        decode repeats base64 + HMAC-SHA256 + JSON parsing for an
+        identical result. Successful decodes are cached until the
+        token's own exp; failures are never cached, so garbage tokens
+        can't fill the table.
+        """
+        now = time.time()
+        with self._token_cache_lock:
+            entry = self._token_cache.get(token)
+            if entry is not None:
+                payload, exp = entry
+                if exp > now:
+                    self._token_cache.move_to_end(token)
+                    return payload
+                del self._token_cache[token]
+
         try:
-            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        except JWTError:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except InvalidTokenError:
             return None
 
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)) and exp > now:
+            with self._token_cache_lock:
+                self._token_cache[token] = (payload, exp)
+                self._token_cache.move_to_end(token)
+                while len(self._token_cache) > TOKEN_CACHE_MAX:
+                    self._token_cache.popitem(last=False)
+        return payload
+
 
 # Module-level singleton
 security_manager = SecurityManager()
@@ -53,4 +145,6 @@ hash_password = security_manager.hash_password
 verify_password = security_manager.verify_password
 create_access_token = security_manager.create_access_token
 decode_access_token = security_manager.decode_access_token
-DUMMY_HASH = security_manager.get_dummy_hash()
+get_dummy_hash = security_manager.get_dummy_hash
+hash_session_token = security_manager.hash_session_token
+verify_session_token = security_manager.verify_session_token